@@ -25,6 +25,7 @@
 ###############################################################################
 import itertools
 from collections import defaultdict 
+from dragon.util import GrammarAnalysis
 
 class Grammar(object):
    '''Represents the grammar of the language to parse. This include syntactic
@@ -62,6 +63,7 @@ class Grammar(object):
       self._terminals = set() if not terminals else set(terminals)
       self._semantic = dict()
       self._counter_generator = 0
+      self._analysis = None
 
       if start_symbol:
          self.augment(start_symbol)
@@ -100,6 +102,7 @@ class Grammar(object):
    def add_terminal(self, terminal):
       '''Adds a terminal.'''
       self._terminals.add(terminal)
+      self._analysis = None
 
    def add_rule(self, symbol, rule):
       '''Adds a rule, like symbol -> rule.
@@ -143,6 +146,7 @@ class Grammar(object):
 
       self._productions[symbol].append(tuple(rule))
       self._assign_semantic_action(symbol, semantic_action)
+      self._analysis = None
 
 
    def add_empty(self, symbol, semantic_action = None):
@@ -157,6 +161,7 @@ class Grammar(object):
           semantic action described in 'add_rule'. '''
       self._productions[symbol].append((Grammar.EMPTY,))
       self._assign_semantic_action(symbol, semantic_action)
+      self._analysis = None
 
       assert self.is_empty_rule(self[symbol][-1])
 
@@ -196,6 +201,18 @@ class Grammar(object):
       
       return None
 
+   def analysis(self):
+      '''Returns the GrammarAnalysis of this grammar (see the module util)
+         which holds the 'first' sets and the 'nullable' property of each 
+         symbol.
+         The analysis is built once and it is discarded each time that the
+         grammar is modified by 'add_terminal', 'add_rule' or 'add_empty'.
+         '''
+      if self._analysis is None:
+         self._analysis = GrammarAnalysis(self)
+
+      return self._analysis
+
    def __getitem__(self, symbol):
       '''A overloaded operator []. 
          Returns a secuence of rules (and each rule is a secuence of strings 
@@ -0,0 +1,262 @@
+'''This module contains a binary format of the parsing tables which can be
+   memory-mapped: the rows of the tables are decoded only when the driver 
+   uses them, so the processes that load the same file share one copy of 
+   it.
+   See the function write_binary and the class BinaryTables in this module.
+   '''
+#########################################################################
+#                                                                       #
+#                        This work is licensed under a                  #
+#   CC BY-SA        Creative Commons Attribution-ShareAlike             #
+#                           3.0 Unported License.                       #
+#                                                                       #
+#########################################################################
+
+###############################################################################
+#                                                                             #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS        #
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT          #
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A    #
+#  PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER  #
+#  OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,   #
+#  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,        #
+#  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR         #
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF     #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING       #
+#  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS         #
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.               #
+#                                                                             #
+###############################################################################
+import mmap
+import struct
+from dragon.grammar import Grammar
+from dragon.lr.driver import Driver
+from dragon.lr.tables import SHIFT, REDUCE
+
+MAGIC = 'DRGT'
+VERSION = 1
+
+# magic, version, number of symbols, of rules and of states, the index of 
+# the start state and the positions of the rules and of the offsets of the 
+# rows of the Action and Goto tables.
+HEADER = struct.Struct('<4s8i')
+INTEGER = struct.Struct('<i')
+
+# Each action is (symbol, kind, next state or production, production)
+# and each goto is (symbol, next state).
+ACTION_SIZE = 4
+GOTO_SIZE = 2
+
+def _pack(values):
+   '''Returns the 'values', integers, packed.'''
+   return struct.pack('<%ii' % len(values), *values)
+
+def write_binary(parsing_tables, path):
+   '''Writes the 'parsing_tables' (see the module tables) in the file 'path'.
+      
+      The states are renumbered from 0 and the symbols are replaced by 
+      integers. The file has a header, the names of the symbols, the rules
+      and, for each table, the offsets of the rows followed by the rows:
+      the row of the state i starts at the offset i and ends at the offset
+      i + 1.
+      '''
+   states = sorted(set(parsing_tables.action_table) | 
+                   set(parsing_tables.goto_table) | 
+                   set([parsing_tables.start_state]))
+   index_of_state = dict((state, index) for index, state in enumerate(states))
+
+   symbols = set()
+   for symbol, rule in parsing_tables.rules:
+      symbols.add(symbol)
+      symbols.update(rule)
+   for table in (parsing_tables.action_table, parsing_tables.goto_table):
+      for row in table.values():
+         symbols.update(row)
+
+   symbols = sorted(symbols)
+   id_of_symbol = dict((symbol, i) for i, symbol in enumerate(symbols))
+
+   names = ''.join(INTEGER.pack(len(symbol)) + symbol for symbol in symbols)
+   names += '\0' * (-len(names) % 4)
+
+   rules = []
+   for symbol, rule in parsing_tables.rules:
+      rules.extend([id_of_symbol[symbol], len(rule)])
+      rules.extend(id_of_symbol[sym] for sym in rule)
+
+   action_rows = []
+   for state in states:
+      row = parsing_tables.action_table.get(state, {})
+      entries = []
+      for terminal in sorted(row):
+         action = row[terminal]
+         if action[0] == SHIFT:
+            entries.extend([id_of_symbol[terminal], SHIFT, 
+                            index_of_state[action[1]], action[2]])
+         else:
+            entries.extend([id_of_symbol[terminal], action[0], 
+                            action[-1] if len(action) > 1 else 0, 0])
+
+      action_rows.append(entries)
+
+   goto_rows = []
+   for state in states:
+      row = parsing_tables.goto_table.get(state, {})
+      goto_rows.append([value for symbol in sorted(row) 
+                           for value in (id_of_symbol[symbol], 
+                                         index_of_state[row[symbol]])])
+
+   rules_position = HEADER.size + len(names)
+   action_position = rules_position + 4 * len(rules)
+   action_section = _section(action_rows, action_position)
+   goto_position = action_position + len(action_section)
+   goto_section = _section(goto_rows, goto_position)
+
+   with open(path, 'wb') as target:
+      target.write(HEADER.pack(MAGIC, VERSION, len(symbols), 
+            len(parsing_tables.rules), len(states), 
+            index_of_state[parsing_tables.start_state], 
+            rules_position, action_position, goto_position))
+      target.write(names)
+      target.write(_pack(rules))
+      target.write(action_section)
+      target.write(goto_section)
+
+def _section(rows, position):
+   '''Returns the offsets of the 'rows' followed by the 'rows', packed, 
+      being 'position' the position of the section in the file.'''
+   offset = position + 4 * (len(rows) + 1)
+   offsets = [offset]
+   for row in rows:
+      offset += 4 * len(row)
+      offsets.append(offset)
+
+   return _pack(offsets) + ''.join(_pack(row) for row in rows)
+
+
+class _LazyTable(object):
+   '''See __init__'''
+
+   def __init__(self, buffer_, offsets_position, count, decode):
+      '''A table whose rows are decoded from the 'buffer_' the first time 
+         that they are accessed. The offsets of the 'count' rows are in the
+         'offsets_position' and each row is decoded by 'decode', a function
+         which receives the integers of the row.'''
+      self._buffer = buffer_
+      self._offsets_position = offsets_position
+      self._count = count
+      self._decode = decode
+      self._rows = dict()
+
+   def __getitem__(self, state):
+      if state not in self._rows:
+         if not 0 <= state < self._count:
+            raise KeyError(state)
+
+         start, end = struct.unpack_from('<2i', self._buffer, 
+                                         self._offsets_position + 4 * state)
+         self._rows[state] = self._decode(struct.unpack_from(
+               '<%ii' % ((end - start) // 4), self._buffer, start))
+
+      return self._rows[state]
+
+   def __contains__(self, state):
+      return 0 <= state < self._count
+
+   def __len__(self):
+      return self._count
+
+   def __iter__(self):
+      return iter(range(self._count))
+
+   def keys(self):
+      # pylint: disable=C0111
+      return range(self._count)
+
+   def get(self, state, default = None):
+      # pylint: disable=C0111
+      return self[state] if state in self else default
+
+
+class BinaryTables(object):
+   '''See __init__'''
+
+   def __init__(self, path):
+      '''Maps, read-only, the file 'path' written by write_binary.
+         Only the header, the names of the symbols and the rules are 
+         decoded here. The rows of the tables are decoded when they are used
+         (see the method bind).'''
+      with open(path, 'rb') as source:
+         self._buffer = mmap.mmap(source.fileno(), 0, 
+                                  access = mmap.ACCESS_READ)
+
+      (magic, version, symbols_count, rules_count, self.states_count, 
+       self.start_state, rules_position, self._action_position, 
+       self._goto_position) = HEADER.unpack_from(self._buffer, 0)
+      if magic != MAGIC or version != VERSION:
+         self._buffer.close()
+         raise ValueError("'%s' is not a file of tables of this version." % (
+                                                                     path, ))
+
+      position = HEADER.size
+      self.symbols = []
+      for _ in range(symbols_count):
+         length, = INTEGER.unpack_from(self._buffer, position)
+         self.symbols.append(self._buffer[position + 4:position + 4 + length])
+         position += 4 + length
+
+      position = rules_position
+      self.rules = []
+      for _ in range(rules_count):
+         symbol, length = struct.unpack_from('<2i', self._buffer, position)
+         rule = struct.unpack_from('<%ii' % length, self._buffer, position + 8)
+         self.rules.append((self.symbols[symbol], 
+                            tuple(self.symbols[sym] for sym in rule)))
+         position += 4 * (2 + length)
+
+   def bind(self, semantic_actions):
+      '''Returns the Action and Goto tables and the id of the start state
+         like ParsingTables.bind (see the module tables), but the tables 
+         decode each row the first time that it is used.'''
+      symbols = self.symbols
+      rules = self.rules
+      reduces = [Driver.Reduce(symbol, rule, semantic_definition, 
+                               Grammar.is_empty_rule(rule))
+                  for (symbol, rule), semantic_definition in zip(rules, 
+                                                            semantic_actions)]
+      accept = Driver.Accept()
+
+      def decode_actions(values):
+         '''Decodes a row of the Action table.'''
+         row = dict()
+         for i in range(0, len(values), ACTION_SIZE):
+            symbol, kind, first, second = values[i:i + ACTION_SIZE]
+            if kind == SHIFT:
+               row[symbols[symbol]] = Driver.Shift(first, *rules[second])
+            elif kind == REDUCE:
+               row[symbols[symbol]] = reduces[first]
+            else:
+               row[symbols[symbol]] = accept
+
+         return row
+
+      def decode_gotos(values):
+         '''Decodes a row of the Goto table.'''
+         return dict((symbols[values[i]], values[i + 1]) 
+                        for i in range(0, len(values), GOTO_SIZE))
+
+      return (_LazyTable(self._buffer, self._action_position, 
+                         self.states_count, decode_actions),
+              _LazyTable(self._buffer, self._goto_position, 
+                         self.states_count, decode_gotos),
+              self.start_state)
+
+   def driver(self, semantic_actions):
+      '''Returns a Driver with these tables bound to the 'semantic_actions'
+         (see the method bind).'''
+      return Driver(*self.bind(semantic_actions))
+
+   def close(self):
+      '''Unmaps the file. The tables returned by 'bind' can not be used 
+         after this.'''
+      self._buffer.close()
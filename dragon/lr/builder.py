@@ -27,8 +27,21 @@
 import collections
 from dragon.lr.driver import Driver
 from dragon.lr.item import LR1, LALR
-from dragon.lr.util import kernel_collection, closure, goto
-from dragon.lr.conflict import handler_conflict
+from dragon.lr.util import automaton, closure
+from dragon.lr.conflict import handler_conflict, LRConflict
+from dragon.lr.compact import build_parsing_table_compact, \
+                              build_parsing_table_slr
+from dragon.lr.deremer import build_parsing_table_deremer
+from dragon.lr.pager import build_parsing_table_pager
+from dragon.lr.compress import use_default_reductions
+
+# The algorithms that can be selected by name in build_parsing_table, 
+# from the cheapest (and less powerful) to the most expensive.
+ALGORITHMS = (
+      ('slr', build_parsing_table_slr),
+      ('lalr', build_parsing_table_deremer),
+      ('lr1', build_parsing_table_pager),
+      )
 
 class UserFriendlyMapping:
    '''See the documentation of __init__.'''
@@ -54,32 +67,35 @@ class UserFriendlyMapping:
       
       return self._id_by_state[hashed_state]
 
-def populate_goto_table_from_state(grammar, state_set, goto_table, to_id):
-   '''Builds the Goto table.'''
-   for anysymbol in grammar.iter_on_all_symbols():
-      next_state = goto(state_set, anysymbol, grammar)
-      if next_state:
-         goto_table[to_id[state_set]][anysymbol] = to_id[next_state]
+def populate_goto_table_from_state(state, goto_table, to_id):
+   '''Builds the Goto table from the transitions of the 'state'.'''
+   for symbol, next_state in state.transitions.items():
+      goto_table[to_id[state.items]][symbol] = to_id[next_state.items]
 
 # pylint: disable=C0103
-def populate_action_table_from_state(grammar, state_set, 
+def populate_action_table_from_state(grammar, state, 
       action_table, handle_shift_reduce, to_id):
    '''Builds the Action table.'''
+   state_set = state.items
    for item in state_set:
       next_symbol = item.next_symbol(grammar)
       if item.sym_production == grammar.START and item.position == 1: 
          #Item is S' -> S*
          action = Driver.Accept()
          if grammar.EOF in action_table[to_id[state_set]] and \
-               action != action_table[to_id[state_set]][grammar.EndOfSource]:
-            raise KeyError(grammar.EOF)
+               action != action_table[to_id[state_set]][grammar.EOF]:
+            action = handler_conflict(
+                  action, 
+                  action_table[to_id[state_set]][grammar.EOF], 
+                  grammar.EOF, 
+                  handle_shift_reduce)
 
          action_table[to_id[state_set]][grammar.EOF] = action
 
       elif next_symbol and not grammar.is_a_nonterminal(next_symbol): 
          #Item is A -> a*bc
          assert not grammar.is_empty(next_symbol)
-         goto_state_hash = to_id[goto(state_set, next_symbol, grammar)]
+         goto_state_hash = to_id[state.transitions[next_symbol].items]
          action = Driver.Shift(
                goto_state_hash, 
                item.sym_production, 
@@ -119,7 +135,8 @@ def populate_action_table_from_state(grammar, state_set,
 
 
 def build_parsing_table(grammar, start_item, handle_shift_reduce = True,
-      disable_mapping = False):
+      disable_mapping = False, compact = False, algorithm = None, 
+      processes = None, default_reductions = False):
    '''Builds the Action and Goto tables for be used by a driver returning
       these tables and the id of the start state, where the driver will use
       as a point of start to parse.
@@ -136,98 +153,199 @@ def build_parsing_table(grammar, start_item, handle_shift_reduce = True,
       its hash. This is only useful for testing and should not be modified
       in the normal case.
 
+      If 'compact' is True, the states are built encoding the LR0 and LR1 
+      items as integers and merging the LR1 items with the same core (see
+      the function build_parsing_table_compact in the module compact), 
+      which is faster and uses much less memory.
+      The tables are equivalent, only the identifiers of the states can
+      be different.
+      The states of the LR(1) automaton can be expanded in parallel by a
+      number of 'processes' (see compact_automaton in the module compact);
+      with other items or algorithms 'processes' raises ValueError.
+      With LALR items, 'compact' selects the method of DeRemer and Pennello
+      to compute the lookaheads (see the function build_parsing_table_deremer
+      in the module deremer).
+
+      The 'algorithm' selects the class of the tables instead of the type of
+      the 'start_item' (only its core is used): 'slr', 'lalr' or 'lr1' (see
+      ALGORITHMS in this module; the 'lr1' tables are the minimal LR(1) 
+      tables of the module pager). All of them use the integer encoding
+      of 'compact'.
+      If 'algorithm' is 'auto', the cheapest class without conflicts is 
+      selected, see the function build_parsing_table_auto in this module
+      (the function select_algorithm returns the name of that class with 
+      its tables).
+      Other names raise ValueError.
+
+      If 'default_reductions' is True, the most common Reduce action of each
+      state is its default action (see the function use_default_reductions
+      in the module compress).
+
       Preconditions: the grammar must be already processed.'''
+   if processes is not None and not (compact and algorithm is None and 
+                                       isinstance(start_item, LR1)):
+      raise ValueError("The option 'processes' is supported only with "
+                       "compact=True and a LR1 start item.")
+
+   if default_reductions:
+      tables = build_parsing_table(grammar, start_item, handle_shift_reduce, 
+            disable_mapping, compact, algorithm, processes)
+      return (use_default_reductions(tables[0]), ) + tables[1:]
+
+   if algorithm == 'auto':
+      return build_parsing_table_auto(grammar, start_item, 
+            handle_shift_reduce, disable_mapping)
+
+   if algorithm is not None:
+      if algorithm not in dict(ALGORITHMS):
+         raise ValueError("Unknown algorithm %r, expected one of %s." % (
+            algorithm, ", ".join(repr(name) for name, _ in ALGORITHMS + 
+                                                         (('auto', None),))))
+
+      return dict(ALGORITHMS)[algorithm](grammar, start_item, 
+            handle_shift_reduce, disable_mapping)
+
    if isinstance(start_item, LALR):
+      if compact:
+         return build_parsing_table_deremer(grammar, start_item, 
+               handle_shift_reduce, disable_mapping)
+
       return build_parsing_table_lalr(grammar, start_item, handle_shift_reduce)
 
+   if compact:
+      return build_parsing_table_compact(grammar, start_item, 
+            handle_shift_reduce, disable_mapping, processes)
+
    action_table = collections.defaultdict(dict)
    goto_table = collections.defaultdict(dict)
-   kernels = kernel_collection(grammar, start_item)
-   start_set_hash = None
+   states = automaton(grammar, start_item)
 
    to_id = UserFriendlyMapping(disable_mapping)
+   start_set_hash = to_id[states[0].items]
 
-   for kernel in kernels:
-      state_set = closure(kernel, grammar)
-      
-      populate_goto_table_from_state(grammar, state_set, goto_table, to_id)
+   for state in states:
+      populate_goto_table_from_state(state, goto_table, to_id)
       populate_action_table_from_state(
             grammar, 
-            state_set, 
+            state, 
             action_table, 
             handle_shift_reduce,
             to_id)
-      
-      if not start_set_hash:
-         for item in state_set:
-            if item == start_item:
-               start_set_hash = to_id[state_set]
 
    return dict(action_table), dict(goto_table), start_set_hash
 
 
-# pylint: disable=C0103
-# pylint: disable=R0914
-def generate_spontaneously_lookaheads(grammar, start_item, to_id):
-   '''Builds a LR0 table using as a seed the start_item and then tries to 
-      determinate what terminals are lookahead of each item (in which case, 
-      these lookaheads are spontaneously generated), building initially the
-      LALR items (they are very similar to the LR0 item but can be modified
-      adding to him lookaheads, see the documentation of LALR class in the 
-      item module).
+def build_parsing_table_auto(grammar, start_item, handle_shift_reduce = True,
+      disable_mapping = False):
+   '''Builds the tables of each class of ALGORITHMS (in this module), from
+      the cheapest to the most expensive, until the tables have not any 
+      conflict that cannot be solved (see handler_conflict and its
+      parameter 'handle_shift_reduce'). 
+      
+      Returns the Action and Goto tables and the id of the start state of 
+      the first class without conflicts, or raises the conflict of the last 
+      class. See select_algorithm to know the class selected too.
       '''
+   return select_algorithm(grammar, start_item, handle_shift_reduce, 
+         disable_mapping)[1]
+
+def select_algorithm(grammar, start_item, handle_shift_reduce = True,
+      disable_mapping = False):
+   '''Like build_parsing_table_auto (see that function) but returns the 
+      name of the class selected, like 'lalr', and its tables (each class is
+      built once).'''
+   for name, builder in ALGORITHMS[:-1]:
+      try:
+         return name, builder(grammar, start_item, handle_shift_reduce, 
+               disable_mapping)
+      except LRConflict:
+         pass
+
+   name, builder = ALGORITHMS[-1]
+   return name, builder(grammar, start_item, handle_shift_reduce, 
+         disable_mapping)
+
+def _probe_transitions(grammar, item):
+   '''Returns, for each item not at the end of the closure of the LR1 item
+      with the core of 'item' and the lookahead PROBE, a tuple with its next 
+      symbol, the core of its shifted item and its lookahead.
+
+      The result depends only in the core of 'item' so it is computed once 
+      per grammar.'''
+   memo = grammar.analysis().memo('probe_transitions')
+   core = (item.sym_production, item.alternative, item.position)
+   if core not in memo:
+      transitions = []
+      for item_lr1 in closure(set([LR1(item.sym_production, item.alternative,
+                                       item.position, grammar.PROBE)]), 
+                              grammar):
+         next_symbol = item_lr1.next_symbol(grammar)
+         if next_symbol:
+            transitions.append((next_symbol, 
+                                (item_lr1.sym_production, 
+                                 item_lr1.alternative, 
+                                 item_lr1.position + 1), 
+                                item_lr1.lookahead))
+
+      memo[core] = tuple(transitions)
+
+   return memo[core]
 
+# pylint: disable=C0103
+def _spontaneously_lookaheads_automaton(grammar, start_item, to_id):
+   '''Builds the automaton of LALR items and its goto table, and registers
+      the spontaneously generated lookaheads and the subscriptions between
+      the LALR items (see generate_spontaneously_lookaheads).
+
+      Returns the states (see the function automaton in the util module) 
+      and the goto table.
+      '''
    goto_table = collections.defaultdict(dict)
    
    lalr_start_item = LALR(
          start_item.sym_production, 
          start_item.alternative, 
-         start_item.position)
+         start_item.position,
+         grammar.analysis())
    lalr_start_item.add_new(grammar.EOF)
-   kernels_lalr = kernel_collection(grammar, lalr_start_item)
+   states = automaton(grammar, lalr_start_item)
 
-   ids_kernes_lalr = dict()
-   for kernels in kernels_lalr:
-      closure_lalr = closure(kernels, grammar)
-      ids_kernes_lalr[to_id[closure_lalr]] = kernels
-      populate_goto_table_from_state(grammar, closure_lalr, goto_table, to_id)
+   for state in states:
+      populate_goto_table_from_state(state, goto_table, to_id)
 
-   for id_, kernels in ids_kernes_lalr.iteritems():
-      for item_lalr in kernels:
-         closure_lr1 = closure(set([LR1(
-            item_lalr.sym_production, 
-            item_lalr.alternative, 
-            item_lalr.position, 
-            grammar.PROBE)]), grammar)
-
-         for item_lr1 in closure_lr1:
-            next_symbol = item_lr1.next_symbol(grammar)
-            if not next_symbol:
-               continue
-            item_lr1_shifted = item_lr1.item_shifted(grammar)
-               
-            assert id_ in goto_table
-            goto_set_id = goto_table[id_][next_symbol]
-            goto_set = ids_kernes_lalr[goto_set_id]
-
-            item_lalr_from_shifted = LALR(
-                  item_lr1_shifted.sym_production, 
-                  item_lr1_shifted.alternative, 
-                  item_lr1_shifted.position)
-            assert item_lalr_from_shifted in goto_set
-            
-            singleton = (goto_set - (goto_set - {item_lalr_from_shifted}))
-            assert len(singleton) == 1
-            
-            item_lalr_hidden = set(singleton).pop()
-
-            if item_lr1.lookahead != grammar.PROBE:
-               item_lalr_hidden.add_new(item_lr1.lookahead)
+   kernel_by_core = dict((state, dict((item.key(), item) 
+                                             for item in state.kernel)) 
+                                                for state in states)
+   for state in states:
+      for item_lalr in state.kernel:
+         for next_symbol, core, lookahead in _probe_transitions(grammar, 
+                                                                item_lalr):
+            next_state = state.transitions[next_symbol]
+            item_lalr_hidden = kernel_by_core[next_state][core]
+
+            if lookahead != grammar.PROBE:
+               item_lalr_hidden.add_new(lookahead)
 
             else:
                item_lalr.subscribe(item_lalr_hidden)
 
-   return kernels_lalr, goto_table
+   return states, dict(goto_table)
+
+def generate_spontaneously_lookaheads(grammar, start_item, to_id):
+   '''Builds a LR0 table using as a seed the start_item and then tries to 
+      determinate what terminals are lookahead of each item (in which case, 
+      these lookaheads are spontaneously generated), building initially the
+      LALR items (they are very similar to the LR0 item but can be modified
+      adding to him lookaheads, see the documentation of LALR class in the 
+      item module).
+
+      Returns the kernels of LALR items and the goto table.
+      '''
+   states, goto_table = _spontaneously_lookaheads_automaton(
+         grammar, 
+         start_item, 
+         to_id)
+   return [state.kernel for state in states], goto_table
 
 def propagate_lookaheads(kernels_lalr):
    '''The spontaneously generated terminals are propagated from one item to 
@@ -235,12 +353,12 @@ def propagate_lookaheads(kernels_lalr):
       Initially, the items are LALR items, but with few or none lookaheads 
       terminals. This function completes these LALR items.
       '''
-   changes = True
-   while changes:
-      changes = False
-      for kernels in kernels_lalr:
-         for item_lalr in kernels:
-            changes |= item_lalr.propagate()
+   # Only the items with new lookaheads are propagated: each item is
+   # added again to the worklist when it learns something new.
+   to_propagate = [item_lalr for kernels in kernels_lalr 
+                                 for item_lalr in kernels]
+   while to_propagate:
+      to_propagate.extend(to_propagate.pop().propagate_news())
 
    for kernels in kernels_lalr:
       for item_lalr in kernels:
@@ -268,26 +386,20 @@ def build_parsing_table_lalr(grammar, start_item, handle_shift_reduce = True,
 
    to_id = UserFriendlyMapping(disable_mapping)
    action_table = collections.defaultdict(dict)
-   start_set_hash = None
    
-   kernels_lalr, goto_table = generate_spontaneously_lookaheads(
+   states, goto_table = _spontaneously_lookaheads_automaton(
          grammar, 
          start_item,
          to_id)
-   propagate_lookaheads(kernels_lalr)
-   for kernel in kernels_lalr:
-      state_set = closure(kernel, grammar)
+   propagate_lookaheads([state.kernel for state in states])
+   start_set_hash = to_id[states[0].items]
+
+   for state in states:
       populate_action_table_from_state(
             grammar, 
-            state_set, 
+            state, 
             action_table, 
             handle_shift_reduce,
             to_id)
-      
-      if not start_set_hash:
-         for item in state_set:
-            if item == start_item:
-               start_set_hash = to_id[state_set]
-               break
    
    return dict(action_table), dict(goto_table), start_set_hash
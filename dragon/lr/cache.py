@@ -0,0 +1,169 @@
+'''This module contains a persistent cache of parsing tables in a directory,
+   so the tables of a grammar are built once and loaded by the next 
+   processes.
+   See the class TableCache and the function build_parsing_table_cached in 
+   this module.
+   '''
+#########################################################################
+#                                                                       #
+#                        This work is licensed under a                  #
+#   CC BY-SA        Creative Commons Attribution-ShareAlike             #
+#                           3.0 Unported License.                       #
+#                                                                       #
+#########################################################################
+
+###############################################################################
+#                                                                             #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS        #
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT          #
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A    #
+#  PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER  #
+#  OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,   #
+#  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,        #
+#  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR         #
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF     #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING       #
+#  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS         #
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.               #
+#                                                                             #
+###############################################################################
+import hashlib
+import os
+import cPickle as pickle
+import tempfile
+from dragon.lr.item import LR1
+from dragon.lr.builder import build_parsing_table
+from dragon.lr.tables import ParsingTables, productions, semantic_actions
+
+# The version of the format of the data stored in the cache. It must be
+# incremented each time that the ParsingTables or the builders change, so the
+# tables stored by an older version are not loaded.
+FORMAT_VERSION = 2
+
+# The options of build_parsing_table which do not change the tables.
+BUILD_ONLY_OPTIONS = ('processes', )
+
+def fingerprint(grammar, algorithm):
+   '''Returns a string that identifies the 'grammar' (its productions, 
+      terminals and start symbol) and the 'algorithm' used to build its
+      tables (any object with a stable repr).
+      
+      The fingerprint is the same in any process while the grammar, the 
+      algorithm and the FORMAT_VERSION are the same. The semantic actions 
+      are not part of the fingerprint.'''
+   description = (
+         FORMAT_VERSION,
+         grammar.start_symbol(),
+         sorted(symbol for symbol in grammar.iter_on_all_symbols() 
+                        if not grammar.is_a_nonterminal(symbol)),
+         [(symbol, grammar[symbol][alternative]) 
+               for symbol, alternative in productions(grammar)],
+         algorithm)
+   return hashlib.sha1(repr(description)).hexdigest()
+
+
+class TableCache(object):
+   '''See __init__'''
+
+   def __init__(self, directory, max_size = 64 * 1024 * 1024):
+      '''A cache of tables in the 'directory', one file per fingerprint
+         (see the function fingerprint). 
+         
+         If the files take more than 'max_size' bytes, the least recently 
+         used files are removed. A file is used when it is loaded or stored.
+         '''
+      self._directory = directory
+      self._max_size = max_size
+      if not os.path.isdir(directory):
+         os.makedirs(directory)
+
+   def _path(self, key):
+      '''Returns the path of the file of the fingerprint 'key'.'''
+      return os.path.join(self._directory, key + '.tables')
+
+   def load(self, key):
+      '''Returns the data stored with the fingerprint 'key' or None if there
+         is no data or it cannot be loaded (any error is a miss).'''
+      path = self._path(key)
+      try:
+         with open(path, 'rb') as source:
+            data = pickle.load(source)
+      except Exception: # pylint: disable=W0703
+         return None
+
+      try:
+         os.utime(path, None)
+      except OSError:
+         pass # a read-only cache
+
+      return data
+
+   def store(self, key, data):
+      '''Stores the 'data' with the fingerprint 'key' and removes the least
+         recently used files if the cache is too big.
+         The file is written completely before being visible for others.'''
+      descriptor, temporal_path = tempfile.mkstemp(dir = self._directory)
+      try:
+         with os.fdopen(descriptor, 'wb') as target:
+            pickle.dump(data, target, pickle.HIGHEST_PROTOCOL)
+
+         os.rename(temporal_path, self._path(key))
+      except: # pylint: disable=W0702
+         os.remove(temporal_path)
+         raise
+
+      self._evict()
+
+   def _evict(self):
+      '''Removes the least recently used files until the size of the cache
+         is less than the max size.'''
+      entries = []
+      for name in os.listdir(self._directory):
+         if name.endswith('.tables'):
+            stat = os.stat(os.path.join(self._directory, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+      size = sum(entry_size for _, entry_size, _ in entries)
+      for _, entry_size, name in sorted(entries):
+         if size <= self._max_size:
+            break
+
+         try:
+            os.remove(os.path.join(self._directory, name))
+         except OSError:
+            pass
+
+         size -= entry_size
+
+
+def build_parsing_table_cached(grammar, start_item, cache, 
+      handle_shift_reduce = True, **options):
+   '''Like build_parsing_table (see the module builder) but the tables are
+      loaded from the 'cache' (see TableCache) if they were built before for
+      the same grammar, start item and options. In that case, the tables
+      are not built at all.
+      The cache stores ParsingTables (see the module tables) which are bound
+      to the semantic actions of the 'grammar' when they are loaded.
+
+      The 'options' are the keyword arguments of build_parsing_table like
+      'compact' or 'algorithm'. The BUILD_ONLY_OPTIONS (in this module) 
+      are not part of the fingerprint.
+      '''
+   algorithm = (type(start_item).__name__, 
+                start_item.sym_production, 
+                start_item.alternative, 
+                start_item.position,
+                start_item.lookahead if isinstance(start_item, LR1) else None,
+                handle_shift_reduce,
+                sorted(option for option in options.items() 
+                           if option[0] not in BUILD_ONLY_OPTIONS))
+   key = fingerprint(grammar, algorithm)
+
+   data = cache.load(key)
+   if data is None:
+      tables = build_parsing_table(grammar, start_item, handle_shift_reduce, 
+            **options)
+      data = ParsingTables.from_tables(grammar, tables)
+      cache.store(key, data)
+
+   return data.bind(semantic_actions(grammar))
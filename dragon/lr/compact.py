@@ -0,0 +1,409 @@
+'''This module contains an alternative construction of the LR(0) and LR(1)
+   automatons where each item is encoded as an integer (or a pair of 
+   integers) and each state as a sorted tuple of them.
+   See the function build_parsing_table_compact in this module.
+   '''
+#########################################################################
+#                                                                       #
+#                        This work is licensed under a                  #
+#   CC BY-SA        Creative Commons Attribution-ShareAlike             #
+#                           3.0 Unported License.                       #
+#                                                                       #
+#########################################################################
+
+###############################################################################
+#                                                                             #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS        #
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT          #
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A    #
+#  PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER  #
+#  OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,   #
+#  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,        #
+#  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR         #
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF     #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING       #
+#  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS         #
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.               #
+#                                                                             #
+###############################################################################
+import collections
+import multiprocessing
+from dragon.lr.driver import Driver
+from dragon.lr.item import LR1
+from dragon.lr.conflict import handler_conflict
+
+class Encoding(object):
+   '''See __init__'''
+
+   def __init__(self, grammar):
+      '''Numbers each production and each terminal of the 'grammar' so an
+         item can be encoded as an integer.
+         
+         An item of the production number 'p' with the dot in 'position' 
+         is encoded as the integer 'core' p * stride + position where 
+         'stride' is greater than the length of any rule. For example, the 
+         item A -> a*b, being A -> ab the production 'p', is p * stride + 1.
+         
+         The LR1 items with the same core are merged in only one item, 
+         the pair (core, lookaheads) where 'lookaheads' is a bitmask: the 
+         terminal number 't' is a lookahead if the bit 1 << t is set
+         (the terminals are numbered by the analysis of the grammar).
+         So the LR1 items A -> a*b [x] and A -> a*b [y] are the single item
+         (core, 1 << tx | 1 << ty).
+
+         For each core, the symbol next to the position and the 'first' set
+         of the rest of the rule (as a bitmask) are precomputed.
+         '''
+      self.productions = []
+      self.productions_of = collections.defaultdict(list)
+      for symbol in grammar.iter_nonterminals():
+         for alternative, rule in enumerate(grammar[symbol]):
+            self.productions_of[symbol].append(len(self.productions))
+            self.productions.append((symbol, alternative, 
+                        () if grammar.is_empty_rule(rule) else rule))
+
+      self.stride = 1 + max(len(rule) for _, _, rule in self.productions)
+
+      analysis = grammar.analysis()
+      self.terminals = analysis.terminals
+      self.terminal_ids = dict((terminal, i) 
+                                 for i, terminal in enumerate(self.terminals))
+
+      self._build_cores(grammar)
+      self._build_nonterminal_closures()
+
+   def _build_cores(self, grammar):
+      '''Precomputes, for each core, the next symbol (None if the core is 
+         at the end of its rule) and the pair (first, nullable) of the suffix
+         of the rule that starts at the core, being 'first' a bitmask.'''
+      analysis = grammar.analysis()
+      size = len(self.productions) * self.stride
+      self.next_symbol = [None] * size
+      self.suffix = [None] * size
+      for production_id, (symbol, alternative, rule) in \
+            enumerate(self.productions):
+         base = production_id * self.stride
+         for position in range(len(rule) + 1):
+            if position < len(rule):
+               self.next_symbol[base + position] = rule[position]
+
+            self.suffix[base + position] = analysis.suffix_first_mask(
+                                                         symbol, 
+                                                         alternative, 
+                                                         position)
+
+   def _build_nonterminal_closures(self):
+      '''Precomputes, for each nonterminal B, the cores of the LR0 closure of
+         the items B -> *abc.'''
+      self.nonterminal_closure = dict()
+      for symbol in self.productions_of:
+         cores = set(p * self.stride for p in self.productions_of[symbol])
+         to_process = list(cores)
+         while to_process:
+            next_symbol = self.next_symbol[to_process.pop()]
+            for production_id in self.productions_of.get(next_symbol, ()):
+               core = production_id * self.stride
+               if core not in cores:
+                  cores.add(core)
+                  to_process.append(core)
+
+         self.nonterminal_closure[symbol] = tuple(cores)
+
+   def mask_of(self, terminals):
+      '''Returns the bitmask of the 'terminals'.'''
+      mask = 0
+      for terminal in terminals:
+         mask |= 1 << self.terminal_ids[terminal]
+
+      return mask
+
+   def terminals_of(self, mask):
+      '''Returns the list of terminals of the bitmask 'mask'.'''
+      terminals = []
+      while mask:
+         lowest = mask & -mask
+         terminals.append(self.terminals[lowest.bit_length() - 1])
+         mask ^= lowest
+
+      return terminals
+
+   def core(self, item):
+      '''Encodes the core of the 'item' (see the module item).'''
+      production_id = self.productions_of[item.sym_production][item.alternative]
+      return production_id * self.stride + item.position
+
+   def lr0_closure(self, kernel):
+      '''Returns the cores of the closure of the 'kernel' cores.'''
+      cores = set(kernel)
+      for core in kernel:
+         next_symbol = self.next_symbol[core]
+         if next_symbol in self.nonterminal_closure:
+            cores.update(self.nonterminal_closure[next_symbol])
+
+      return cores
+
+   def lr1_closure(self, kernel):
+      '''Returns the closure of the 'kernel', a sequence of LR1 items 
+         (core, lookaheads), as a dictionary which maps each core to its
+         lookaheads.
+         The lookaheads are propagated as a whole: a core is processed 
+         again only if it learnt new lookaheads.'''
+      lookaheads = dict(kernel)
+      to_process = list(lookaheads)
+      while to_process:
+         core = to_process.pop()
+         next_symbol = self.next_symbol[core]
+         if next_symbol not in self.productions_of:
+            continue
+
+         first_mask, nullable = self.suffix[core + 1]
+         mask = first_mask | lookaheads[core] if nullable else first_mask
+         for production_id in self.productions_of[next_symbol]:
+            next_core = production_id * self.stride
+            known = lookaheads.get(next_core, 0)
+            if mask & ~known:
+               lookaheads[next_core] = known | mask
+               to_process.append(next_core)
+
+      return lookaheads
+
+
+class CompactState(object):
+   '''See __init__'''
+   __slots__ = ('kernel', 'transitions', 'reductions')
+
+   def __init__(self, kernel):
+      '''A state of the automaton: the 'kernel', a sorted tuple of items
+         (cores for a LR(0) automaton, pairs (core, lookaheads) for a LR(1) 
+         automaton), the 'transitions', a dictionary which maps each symbol
+         to the index of the next state, and the 'reductions', a list of 
+         pairs (production id, lookaheads bitmask).
+         The lookaheads of the reductions of a LR(0) automaton are None 
+         until they are set (see slr_automaton).'''
+      self.kernel = kernel
+      self.transitions = dict()
+      self.reductions = []
+
+
+def expand(encoding, kernel, lr1):
+   '''Computes the closure of the 'kernel' of a state (see CompactState) 
+      and returns its reductions and a list of pairs (symbol, kernel of the
+      next state).'''
+   if lr1:
+      items = encoding.lr1_closure(kernel).items()
+   else:
+      items = [(core, None) for core in encoding.lr0_closure(kernel)]
+
+   reductions = []
+   groups = collections.defaultdict(list)
+   for core, lookaheads in items:
+      next_symbol = encoding.next_symbol[core]
+      if next_symbol is None:
+         reductions.append((core // encoding.stride, lookaheads))
+      else:
+         groups[next_symbol].append(
+               (core + 1, lookaheads) if lr1 else core + 1)
+
+   return reductions, [(next_symbol, tuple(sorted(group))) 
+                                 for next_symbol, group in groups.items()]
+
+
+# The encoding and the kind of automaton of the worker processes of 
+# compact_automaton (see _init_worker).
+_WORKER = dict()
+
+def _init_worker(encoding, lr1):
+   '''Initializes a worker process of compact_automaton.'''
+   _WORKER['encoding'] = encoding
+   _WORKER['lr1'] = lr1
+
+def _expand_in_worker(kernel):
+   '''Like expand, but in a worker process.'''
+   return expand(_WORKER['encoding'], kernel, _WORKER['lr1'])
+
+
+def compact_automaton(encoding, start_kernel, lr1, processes = None):
+   '''Builds the states of the LR(0) automaton or, if 'lr1' is True, of the
+      LR(1) automaton from the 'start_kernel' (a sorted tuple of encoded 
+      items, see CompactState).
+      Returns a list of CompactState, being the first the start state.
+
+      If 'processes' is greater than 1, the states are expanded in batches
+      by that number of worker processes: each worker computes the closures
+      and the next kernels of a part of the batch, and the new kernels are
+      deduplicated here. The states are the same but can be in other order.
+      '''
+   index_by_kernel = {start_kernel: 0}
+   states = [CompactState(start_kernel)]
+
+   if processes is None or processes <= 1:
+      to_process = [0]
+      while to_process:
+         state = states[to_process.pop()]
+         state.reductions, successors = expand(encoding, state.kernel, lr1)
+         _add_transitions(state, successors, states, index_by_kernel,
+               to_process)
+
+      return states
+
+   pool = multiprocessing.Pool(processes, _init_worker, (encoding, lr1))
+   try:
+      batch = [0]
+      while batch:
+         chunksize = 1 + len(batch) // (4 * processes)
+         expansions = pool.map(_expand_in_worker, 
+               [states[index].kernel for index in batch], chunksize)
+
+         next_batch = []
+         for index, (reductions, successors) in zip(batch, expansions):
+            states[index].reductions = reductions
+            _add_transitions(states[index], successors, states, 
+                  index_by_kernel, next_batch)
+
+         batch = next_batch
+
+   finally:
+      pool.terminate()
+
+   return states
+
+
+def _add_transitions(state, successors, states, index_by_kernel, to_process):
+   '''Adds the transitions to the 'successors' of the 'state' (see expand),
+      creating the states not seen before and adding them to 'to_process'.'''
+   for next_symbol, kernel in successors:
+      if kernel not in index_by_kernel:
+         index_by_kernel[kernel] = len(states)
+         to_process.append(len(states))
+         states.append(CompactState(kernel))
+
+      state.transitions[next_symbol] = index_by_kernel[kernel]
+
+
+def _set_action(row, terminal, action, handle_shift_reduce):
+   '''Sets the 'action' for the 'terminal' in the 'row' of the action table,
+      see handler_conflict in the module conflict.'''
+   if terminal in row and action != row[terminal]:
+      action = handler_conflict(action, row[terminal], terminal, 
+                                 handle_shift_reduce)
+
+   row[terminal] = action
+
+
+def build_parsing_table_compact(grammar, start_item, 
+      handle_shift_reduce = True, disable_mapping = False, processes = None):
+   '''Builds the Action and Goto tables like build_parsing_table (see the 
+      module builder) for LR0 and LR1 items, but the automaton is built
+      over integers instead of item objects. This uses much less memory
+      and it is faster to hash and compare the states.
+
+      Like the LR0 items, the lookaheads of the reductions of a LR(0) 
+      automaton are the 'follow' of the reduced symbol (see slr_automaton).
+
+      If 'processes' is greater than 1, the states of a LR(1) automaton are
+      expanded in parallel by that number of processes (see 
+      compact_automaton).
+      '''
+   encoding = Encoding(grammar)
+   start_core = encoding.core(start_item)
+   if isinstance(start_item, LR1):
+      start_kernel = (start_core, encoding.mask_of([start_item.lookahead]))
+      states = compact_automaton(encoding, (start_kernel, ), True, processes)
+   else:
+      states = slr_automaton(grammar, encoding, start_core)
+
+   return populate_tables(grammar, encoding, states, start_core,
+         handle_shift_reduce, disable_mapping)
+
+
+def slr_automaton(grammar, encoding, start_core):
+   '''Builds the LR(0) automaton from the item encoded as 'start_core' and
+      sets the lookaheads of each reduction A -> abc to the 'follow' of A,
+      as a SLR(1) parser does. The 'follow' sets of the whole grammar are 
+      computed once (see GrammarAnalysis in the module dragon.util).
+
+      Returns a list of CompactState, being the first the start state.
+      '''
+   analysis = grammar.analysis()
+   states = compact_automaton(encoding, (start_core, ), False)
+   for state in states:
+      state.reductions = [
+            (production_id, 
+             analysis.follow_mask(encoding.productions[production_id][0]))
+               for production_id, _ in state.reductions]
+
+   return states
+
+
+def build_parsing_table_slr(grammar, start_item, handle_shift_reduce = True, 
+      disable_mapping = False):
+   '''Builds the SLR(1) Action and Goto tables like build_parsing_table 
+      (see the module builder) does for a LR0 'start_item': the states are 
+      the states of the LR(0) automaton and the lookaheads of each reduction
+      are the 'follow' of the reduced symbol (see slr_automaton).
+
+      The 'start_item' can be any item (LR0, LR1 or LALR), only its core
+      is used.
+      '''
+   encoding = Encoding(grammar)
+   start_core = encoding.core(start_item)
+   return populate_tables(grammar, encoding, 
+         slr_automaton(grammar, encoding, start_core), start_core, 
+         handle_shift_reduce, disable_mapping)
+
+
+# pylint: disable=R0913,R0914
+def populate_tables(grammar, encoding, states, start_core, 
+      handle_shift_reduce, disable_mapping):
+   '''Builds the Action and Goto tables from the CompactState 'states' of
+      a LR(0) or LR(1) automaton which starts with the item encoded as 
+      'start_core'. The lookaheads of the reductions must be already set.
+      
+      Returns the tables and the id of the start state like 
+      build_parsing_table_compact.'''
+   accept_core = start_core + 1
+   ids = [hash(state.kernel) if disable_mapping else i 
+                                 for i, state in enumerate(states)]
+
+   action_table = collections.defaultdict(dict)
+   goto_table = collections.defaultdict(dict)
+   for state_id, state in zip(ids, states):
+      # The reductions go first so the Reduce-Reduce conflicts are always
+      # detected, even if a Shift action takes precedence over both.
+      for production_id, lookaheads in state.reductions:
+         symbol_production, alternative, _ = \
+               encoding.productions[production_id]
+         if production_id * encoding.stride + 1 == accept_core:
+            _set_action(action_table[state_id], grammar.EOF, 
+                        Driver.Accept(), handle_shift_reduce)
+            continue
+         
+         rule = grammar[symbol_production][alternative]
+         action = Driver.Reduce(
+               symbol_production, 
+               rule,
+               grammar.semantic_definition(symbol_production, alternative), 
+               grammar.is_empty_rule(rule))
+         
+         for terminal in encoding.terminals_of(lookaheads):
+            _set_action(action_table[state_id], terminal, action, 
+                        handle_shift_reduce)
+
+      for symbol, next_index in state.transitions.items():
+         goto_table[state_id][symbol] = ids[next_index]
+         if grammar.is_a_nonterminal(symbol):
+            continue
+
+         shift_core = states[next_index].kernel[0]
+         if isinstance(shift_core, tuple):
+            shift_core = shift_core[0]
+         shift_core -= 1
+         symbol_production, alternative, _ = \
+               encoding.productions[shift_core // encoding.stride]
+         _set_action(action_table[state_id], symbol, 
+               Driver.Shift(ids[next_index], 
+                            symbol_production, 
+                            grammar[symbol_production][alternative]), 
+               handle_shift_reduce)
+
+   return dict(action_table), dict(goto_table), ids[0]
@@ -0,0 +1,324 @@
+'''This module contains transformations of the Action table which make it 
+   smaller but keep the language recognized by the driver.
+   See the documentation of each function.
+   '''
+#########################################################################
+#                                                                       #
+#                        This work is licensed under a                  #
+#   CC BY-SA        Creative Commons Attribution-ShareAlike             #
+#                           3.0 Unported License.                       #
+#                                                                       #
+#########################################################################
+
+###############################################################################
+#                                                                             #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS        #
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT          #
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A    #
+#  PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER  #
+#  OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,   #
+#  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,        #
+#  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR         #
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF     #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING       #
+#  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS         #
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.               #
+#                                                                             #
+###############################################################################
+import inspect
+from dragon.lr.driver import Driver
+
+def use_default_reductions(action_table):
+   '''Returns a copy of the 'action_table' where, in each state with some
+      Reduce action, the entries of its most common Reduce action are 
+      replaced by a single default entry, the key Driver.DEFAULT (like 
+      'yacc' does).
+      
+      The driver does the default action for any terminal without an entry
+      in the state, so an unexpected terminal can cause some reductions 
+      before it is detected as an error, but it is never shifted: the error
+      is detected in the state reached by the reductions.
+      '''
+   compressed_table = dict()
+   for state, row in action_table.items():
+      counts = dict()
+      for action in row.values():
+         if isinstance(action, Driver.Reduce):
+            key = action.production_str()
+            counts[key] = counts.get(key, 0) + 1
+
+      if not counts:
+         compressed_table[state] = dict(row)
+         continue
+
+      default = max(sorted(counts), key = counts.get)
+      compressed_row = compressed_table[state] = dict()
+      for terminal, action in row.items():
+         if isinstance(action, Driver.Reduce) and \
+               action.production_str() == default:
+            compressed_row[Driver.DEFAULT] = action
+         else:
+            compressed_row[terminal] = action
+
+   return compressed_table
+
+
+def _action_key(action, block_of = None):
+   '''Returns a key of the 'action' (a Driver action or an action of the
+      module tables) which is equal only for the actions that do the same.
+      The last states of the chains of a Driver.ChainReduce are replaced by
+      their blocks if 'block_of' is given (see merge_states).'''
+   if isinstance(action, tuple):
+      return action[:2]
+
+   if isinstance(action, Driver.Shift):
+      return str(action)
+
+   if isinstance(action, Driver.ChainReduce):
+      return (action.production_str(), tuple(sorted(
+                  (state, target if block_of is None else block_of[target])
+                     for state, target in action.targets().items())))
+
+   return action.production_str()
+
+def terminal_classes(action_table):
+   '''Returns a dictionary which maps each terminal of the 'action_table'
+      to the id of its class: the terminals of a class have the same action
+      in every state (their columns are identical). 
+      
+      The ids are numbered from 0, in the order of the smallest terminal of
+      each class. The 'action_table' can have Driver actions or actions of 
+      the module tables. Note that the terminals shifted to different states
+      have different classes.
+      '''
+   columns = dict()
+   for state, row in action_table.items():
+      for terminal, action in row.items():
+         if terminal != Driver.DEFAULT:
+            columns.setdefault(terminal, []).append((state, 
+                                                     _action_key(action)))
+
+   classes = dict()
+   ids = dict()
+   for terminal in sorted(columns):
+      column = tuple(sorted(columns[terminal]))
+      classes[terminal] = ids.setdefault(column, len(ids))
+
+   return classes
+
+def use_terminal_classes(action_table):
+   '''Returns a copy of the 'action_table' where the columns are the 
+      classes of terminals (see terminal_classes) and the dictionary which 
+      maps each terminal to its class.
+
+      The driver needs this dictionary to find the class of each token 
+      (see Driver) unless the lexer returns the class instead of the 
+      terminal.
+      '''
+   classes = terminal_classes(action_table)
+   compressed_table = dict()
+   for state, row in action_table.items():
+      compressed_row = compressed_table[state] = dict()
+      for terminal, action in row.items():
+         compressed_row[classes.get(terminal, terminal)] = action
+
+   return compressed_table, classes
+
+def _row_signature(row, block_of):
+   '''Returns a key of the 'row' where the target of each Shift (and the 
+      last states of the chains of each ChainReduce) is its block 
+      ('block_of' maps each state to its block).'''
+   # pylint: disable=W0212
+   return tuple(sorted((terminal, block_of[action._state_to_shift]) 
+                              if isinstance(action, Driver.Shift) 
+                              else (terminal, _action_key(action, block_of)) 
+                           for terminal, action in row.items()))
+
+def _renamed(action, name_of):
+   '''Returns the 'action' with its states renamed by 'name_of'.'''
+   # pylint: disable=W0212
+   if isinstance(action, Driver.Shift):
+      return action.shift_to(name_of[action._state_to_shift])
+
+   if isinstance(action, Driver.ChainReduce):
+      return action.renamed(name_of)
+
+   return action
+
+def merge_states(action_table, goto_table, start_state):
+   '''Merges the states with the same behavior: the same actions (a Shift
+      to states with the same behavior) and the same gotos (to states with
+      the same behavior). The driver does the same steps with the merged
+      tables.
+
+      The classes of states are found by partition refinement: the states
+      are grouped by their actions, and each group is split by the groups 
+      of their next states until no group is split.
+
+      Returns the new Action and Goto tables and start state, and a 
+      dictionary which maps each state of the new tables to the list of the
+      original states merged in it. Each state is renamed to its smallest
+      original state.
+      '''
+   # pylint: disable=W0212
+   states = sorted(set(action_table) | set(goto_table) | set([start_state]))
+   block_of = dict((state, 0) for state in states)
+   count = 1
+   while True:
+      signatures = dict()
+      new_block_of = dict()
+      for state in states:
+         signature = (_row_signature(action_table.get(state, {}), block_of),
+                      tuple(sorted((symbol, block_of[next_state]) 
+                        for symbol, next_state in 
+                              goto_table.get(state, {}).items())),
+                      block_of[state])
+         new_block_of[state] = signatures.setdefault(signature, 
+                                                     len(signatures))
+
+      block_of = new_block_of
+      if len(signatures) == count:
+         break
+
+      count = len(signatures)
+
+   merged = dict()
+   for state in states:
+      merged.setdefault(block_of[state], []).append(state)
+
+   name_of = dict((state, merged[block_of[state]][0]) for state in states)
+   merged = dict((group[0], group) for group in merged.values())
+
+   merged_action_table = dict()
+   merged_goto_table = dict()
+   for name in merged:
+      if name in action_table:
+         merged_action_table[name] = dict(
+               (terminal, _renamed(action, name_of)) 
+                  for terminal, action in action_table[name].items())
+
+      if name in goto_table:
+         merged_goto_table[name] = dict((symbol, name_of[next_state]) 
+                        for symbol, next_state in goto_table[name].items())
+
+   return merged_action_table, merged_goto_table, name_of[start_state], \
+          merged
+
+def _returns_its_argument(value):
+   '''The semantic action of the unit productions which can be bypassed.'''
+   return value
+
+def _is_identity(semantic_definition):
+   '''Returns True if the 'semantic_definition' (see the method 
+      semantic_definition of Grammar) of a unit production returns its only
+      argument: the default definition or a function like 'lambda v: v'.'''
+   if semantic_definition is None:
+      return True
+
+   count, consume, semantic_action = semantic_definition
+   code = getattr(semantic_action, 'func_code', None)
+   return count == 1 and consume and code is not None and \
+         code.co_argcount == 1 and \
+         not code.co_flags & (inspect.CO_VARARGS | inspect.CO_VARKEYWORDS) and \
+         code.co_code == _returns_its_argument.func_code.co_code
+
+def unit_reductions(grammar):
+   '''Returns a dictionary which maps the production string (see 
+      Driver.Reduce) of each unit production of the 'grammar', A -> B where 
+      B is a nonterminal, to A if its semantic action is the identity.'''
+   units = dict()
+   for symbol in grammar.iter_nonterminals():
+      if grammar.is_augmented_start_symbol(symbol):
+         continue
+
+      for i, rule in enumerate(grammar[symbol]):
+         if len(rule) == 1 and grammar.is_a_nonterminal(rule[0]) and \
+               _is_identity(grammar.semantic_definition(symbol, i)):
+            units[symbol + " -> " + rule[0]] = symbol
+
+   return units
+
+def bypass_unit_reductions(grammar, action_table, goto_table):
+   '''Returns a copy of the 'action_table' where each reduction is followed,
+      in the same step, by the reductions of the unit productions A -> B 
+      with an identity semantic (see unit_reductions).
+
+      After a reduction to B with the lookahead 'a', the driver goes to the
+      state q = goto(s, B) where s is the state below the popped states. If 
+      the action of q for 'a' (or its default action) is the reduction of 
+      A -> B, the driver only replaces q by goto(s, A). The new action is a
+      Driver.ChainReduce which goes to the last state of the chain directly.
+      The lookahead of an action of the key Driver.DEFAULT is unknown, so its
+      chain only follows the states whose only action is a default one.
+
+      The bypassed tables can be merged by merge_states but not stored 
+      as data (see ParsingTables.from_tables in the module tables), so the
+      tables of the modules packed, binary, generator and cache must be 
+      bound before being bypassed.
+
+      Like with the default reductions, a wrong token is never shifted but 
+      it can be detected after the chain. Note that a function like 
+      'lambda v: v' does not fail with a token without attribute (None) 
+      when it is bypassed.
+      '''
+   units = unit_reductions(grammar)
+
+   def chain(state, symbol, terminal):
+      '''Returns the last state of the chain of unit reductions from the 
+         'state' after a reduction to 'symbol' with the lookahead 
+         'terminal'.'''
+      next_state = goto_table[state][symbol]
+      visited = set([symbol])
+      while True:
+         row = action_table.get(next_state, {})
+         if terminal == Driver.DEFAULT:
+            action = row[terminal] if row.keys() == [terminal] else None
+         else:
+            action = row.get(terminal, row.get(Driver.DEFAULT))
+
+         if not isinstance(action, Driver.Reduce):
+            return next_state
+
+         symbol = units.get(action.production_str())
+         if symbol is None or symbol in visited or \
+               symbol not in goto_table[state]:
+            return next_state
+
+         visited.add(symbol)
+         next_state = goto_table[state][symbol]
+
+   chained_gotos = dict()
+   def chained_goto_table(symbol, terminal):
+      '''Returns a Goto table (only for 'symbol') to the last state of the
+         chains after a reduction to 'symbol' with the lookahead 'terminal',
+         or None if there is not any chain.'''
+      key = (symbol, terminal)
+      if key not in chained_gotos:
+         table = dict((state, {symbol: chain(state, symbol, terminal)}) 
+                        for state, row in goto_table.items() if symbol in row)
+         if all(table[state][symbol] == goto_table[state][symbol] 
+                                                      for state in table):
+            table = None
+
+         chained_gotos[key] = table
+
+      return chained_gotos[key]
+
+   actions = dict()
+   bypassed_table = dict()
+   for state, row in action_table.items():
+      bypassed_row = bypassed_table[state] = dict(row)
+      for terminal, action in row.items():
+         if not isinstance(action, Driver.Reduce):
+            continue
+
+         key = (action.production_str(), terminal)
+         if key not in actions:
+            # pylint: disable=W0212
+            table = chained_goto_table(action._sym_production, terminal)
+            actions[key] = action if table is None else \
+                                    Driver.ChainReduce(action, table)
+
+         bypassed_row[terminal] = actions[key]
+
+   return bypassed_table
@@ -0,0 +1,192 @@
+'''This module contains the construction of the LALR(1) lookaheads by the
+   method of DeRemer and Pennello: the lookaheads are computed over the 
+   LR(0) automaton with the relations 'reads', 'includes' and 'lookback' 
+   in time linear in the size of these relations.
+   See the function build_parsing_table_deremer in this module.
+   '''
+#########################################################################
+#                                                                       #
+#                        This work is licensed under a                  #
+#   CC BY-SA        Creative Commons Attribution-ShareAlike             #
+#                           3.0 Unported License.                       #
+#                                                                       #
+#########################################################################
+
+###############################################################################
+#                                                                             #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS        #
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT          #
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A    #
+#  PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER  #
+#  OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,   #
+#  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,        #
+#  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR         #
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF     #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING       #
+#  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS         #
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.               #
+#                                                                             #
+###############################################################################
+from dragon.lr.compact import Encoding, compact_automaton, populate_tables
+
+def digraph(relation, initial):
+   '''Computes for each node x the union of initial[x] and the initial sets
+      of each node reachable from x through the 'relation' (a list of
+      lists: relation[x] are the nodes related with x). The sets are 
+      bitmasks.
+
+      The nodes of a strongly connected component share the same set, so
+      each edge is traversed only once (see the algorithm 'Digraph' of
+      DeRemer and Pennello, a variant of the Tarjan's algorithm).
+
+      Returns a list with the set of each node.
+      '''
+   infinity = len(relation) + 1
+   depth = [0] * len(relation)
+   result = list(initial)
+   stack = []
+
+   for node in range(len(relation)):
+      if depth[node]:
+         continue
+
+      stack.append(node)
+      depth[node] = len(stack)
+      to_traverse = [(node, len(stack), iter(relation[node]))]
+      while to_traverse:
+         current, current_depth, successors = to_traverse[-1]
+         for successor in successors:
+            if not depth[successor]:
+               stack.append(successor)
+               depth[successor] = len(stack)
+               to_traverse.append(
+                     (successor, len(stack), iter(relation[successor])))
+               break
+
+            depth[current] = min(depth[current], depth[successor])
+            result[current] |= result[successor]
+
+         else:
+            to_traverse.pop()
+            if depth[current] == current_depth:
+               while True:
+                  top = stack.pop()
+                  depth[top] = infinity
+                  result[top] = result[current]
+                  if top == current:
+                     break
+
+            if to_traverse:
+               parent = to_traverse[-1][0]
+               depth[parent] = min(depth[parent], depth[current])
+               result[parent] |= result[current]
+
+   return result
+
+
+class Relations(object):
+   '''See __init__'''
+
+   def __init__(self, grammar, encoding, states, start_core):
+      '''Numbers each transition over a nonterminal of the LR(0) automaton 
+         'states' (see compact_automaton in the module compact) and 
+         computes the relations between them as lists of adjacency:
+         
+          - 'direct_reads': the terminals shifted just after the 
+            transition, as a bitmask.
+          - 'reads': (p, A) reads (r, C) if the transition (p, A) goes to 
+            the state r and C is a nullable nonterminal.
+          - 'includes': (p, A) includes (q, B) if B -> xAy, 'y' is nullable
+            and the string 'x' goes from q to p.
+          - 'lookback': maps each pair (state, production B -> x) to the 
+            transitions (q, B) where the string 'x' goes from q to the 
+            state.
+
+         The EOF terminal follows the item encoded as 'start_core'.
+         '''
+      analysis = grammar.analysis()
+      self.transitions = []
+      index_of = dict()
+      for state_index, state in enumerate(states):
+         for symbol in state.transitions:
+            if grammar.is_a_nonterminal(symbol):
+               index_of[(state_index, symbol)] = len(self.transitions)
+               self.transitions.append((state_index, symbol))
+
+      self.direct_reads = [0] * len(self.transitions)
+      self.reads = [[] for _ in self.transitions]
+      self.includes = [[] for _ in self.transitions]
+      self.lookback = dict()
+
+      for index, (state_index, symbol) in enumerate(self.transitions):
+         next_index = states[state_index].transitions[symbol]
+         for next_symbol in states[next_index].transitions:
+            if not grammar.is_a_nonterminal(next_symbol):
+               self.direct_reads[index] |= encoding.mask_of([next_symbol])
+            elif analysis.is_nullable(next_symbol):
+               self.reads[index].append(index_of[(next_index, next_symbol)])
+
+         if state_index == 0 and symbol == encoding.next_symbol[start_core]:
+            self.direct_reads[index] |= encoding.mask_of([grammar.EOF])
+
+         for production_id in encoding.productions_of[symbol]:
+            core = production_id * encoding.stride
+            current = state_index
+            while encoding.next_symbol[core] is not None:
+               next_symbol = encoding.next_symbol[core]
+               if grammar.is_a_nonterminal(next_symbol) and \
+                     encoding.suffix[core + 1][1]:
+                  self.includes[index_of[(current, next_symbol)]].append(index)
+
+               current = states[current].transitions[next_symbol]
+               core += 1
+
+            self.lookback.setdefault((current, production_id), []).append(index)
+
+   def follows(self):
+      '''Returns the 'follow' set of each transition, as a bitmask: the 
+         terminals that can follow the nonterminal of the transition.'''
+      read_sets = digraph(self.reads, self.direct_reads)
+      return digraph(self.includes, read_sets)
+
+
+def lalr_automaton(grammar, encoding, start_core):
+   '''Builds the LR(0) automaton from the item encoded as 'start_core' and
+      sets the LALR(1) lookaheads of each reduction of each state. 
+      
+      Returns a list of CompactState, being the first the start state.
+      '''
+   states = compact_automaton(encoding, (start_core, ), False)
+   relations = Relations(grammar, encoding, states, start_core)
+   follows = relations.follows()
+
+   for state_index, state in enumerate(states):
+      reductions = []
+      for production_id, _ in state.reductions:
+         lookaheads = 0
+         for index in relations.lookback.get((state_index, production_id), ()):
+            lookaheads |= follows[index]
+
+         reductions.append((production_id, lookaheads))
+
+      state.reductions = reductions
+
+   return states
+
+
+def build_parsing_table_deremer(grammar, start_item, 
+      handle_shift_reduce = True, disable_mapping = False):
+   '''Builds the LALR Action and Goto tables like build_parsing_table_lalr 
+      (see the module builder) but the lookaheads are computed by the 
+      method of DeRemer and Pennello over the LR(0) automaton built by
+      compact_automaton (see the module compact) instead of being 
+      propagated between the LALR items.
+
+      The 'start_item' can be any item (LR0, LR1 or LALR), only its core
+      is used.
+      '''
+   encoding = Encoding(grammar)
+   start_core = encoding.core(start_item)
+   states = lalr_automaton(grammar, encoding, start_core)
+   return populate_tables(grammar, encoding, states, start_core,
+         handle_shift_reduce, disable_mapping)
@@ -22,11 +22,18 @@
 #  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.               #
 #                                                                             #
 ###############################################################################
+import copy
 from dragon.driver import Driver as DriverInterface
 
 class Driver(DriverInterface):
    '''See the __init__ method.'''
-   def __init__(self, action_table, goto_table, start_state):
+
+   # The key of the action of a row used for any terminal without an 
+   # action in that row (see the module compress).
+   DEFAULT = "<<default>>"
+
+   def __init__(self, action_table, goto_table, start_state, 
+                terminal_classes = None):
       '''The driver is in charge of moving between the states (from the start 
          stage) using the goto table. In each state a decision must be taken, 
          given a token readed by the lexer, the parser must...
@@ -40,28 +47,50 @@ class Driver(DriverInterface):
                there is no other action to do.
 
          The action to do in each state is described in the action table.
+         If there is not action for the token readed, the action of the key
+         Driver.DEFAULT, if any, is done. The lookahead token is checked
+         only by the next state, so a wrong token is detected before it is 
+         shifted. The states whose only action is the default one (if the
+         action table is a dictionary) do not look up the token at all.
+
+         If the columns of the action table are classes of terminals (see 
+         the function use_terminal_classes in the module compress), the 
+         'terminal_classes' maps each terminal to its class.
       '''
       DriverInterface.__init__(self)
       self._action_table = action_table
       self._goto_table = goto_table
       self._start_state = start_state
+      self._terminal_classes = terminal_classes
+      self._default_actions = dict()
+      if isinstance(action_table, dict):
+         self._default_actions = dict((state, row[Driver.DEFAULT]) 
+                  for state, row in action_table.items() 
+                     if row.keys() == [Driver.DEFAULT])
 
    def parse_by_step(self, lexer):
       stack_of_states = [self._start_state]
       synthesized = []
       finish = False
       request_token = False
+      classes = self._terminal_classes
+      default_actions = self._default_actions
 
       for token in lexer.tokenizer():
-         terminal = token[0]
+         terminal = token[0] if classes is None else classes.get(token[0])
          request_token = False
          while not request_token and not finish:
-            if terminal not in self._action_table[stack_of_states[-1]]:
-               raise DriverInterface.UnexpectedToken(
-                           token, 
-                           self._action_table[stack_of_states[-1]].keys())
+            action = default_actions.get(stack_of_states[-1])
+            if action is None:
+               row = self._action_table[stack_of_states[-1]]
+               if terminal in row:
+                  action = row[terminal]
+               elif Driver.DEFAULT in row:
+                  action = row[Driver.DEFAULT]
+               else:
+                  raise DriverInterface.UnexpectedToken(token, 
+                                                        self._expected(row))
  
-            action = self._action_table[stack_of_states[-1]][terminal]
             action.eval(stack_of_states, self._goto_table, synthesized)
             request_token = action.request_token()
             finish = action.finish()
@@ -73,6 +102,15 @@ class Driver(DriverInterface):
  
          synthesized.append(token[1])
    
+   def _expected(self, row):
+      '''Returns the terminals with an action in the 'row'.'''
+      if self._terminal_classes is None:
+         return row.keys()
+
+      return [terminal for terminal, terminal_class in 
+                  sorted(self._terminal_classes.items()) 
+                     if terminal_class in row]
+
    def debug_parse(self, lexer):
       ''' Like the method parse, but in this case, the token read, the action
           of the driver and the states of him will be printed to stdout.
@@ -92,6 +130,12 @@ class Driver(DriverInterface):
       
       def production_str(self):
          return self._production_str
+
+      def shift_to(self, state):
+         '''Returns a copy of this action which shifts to the 'state'.'''
+         shift = copy.copy(self)
+         shift._state_to_shift = state
+         return shift
       
       @classmethod
       def request_token(cls): 
@@ -163,8 +207,36 @@ class Driver(DriverInterface):
       # pylint: disable=W0212
       def __eq__(self, other):
          return isinstance(other, Driver.Reduce) and \
-               other._sym_production == self._sym_production and \
-               other._len_production == self._len_production
+               other._production_str == self._production_str
+
+
+   class ChainReduce(Reduce):
+      '''A Reduce which goes to the state reached after the reductions of
+         the unit productions that follow it (see the function 
+         bypass_unit_reductions in the module compress).'''
+      def __init__(self, reduce_action, goto_table):
+         # pylint: disable=W0231
+         self.__dict__.update(reduce_action.__dict__)
+         self._goto_table = goto_table
+
+      def eval(self, stack_of_states, _goto_table, synthesized):
+         Driver.Reduce.eval(self, stack_of_states, self._goto_table, 
+                            synthesized)
+
+      def targets(self):
+         '''Returns a dictionary which maps each state found below the 
+            reduced states to the last state of its chain.'''
+         return dict((state, row[self._sym_production]) 
+                        for state, row in self._goto_table.items())
+
+      def renamed(self, name_of):
+         '''Returns a copy of this action whose states are renamed by the
+            dictionary 'name_of'.'''
+         chain = copy.copy(self)
+         chain._goto_table = dict((name_of[state], 
+                                   {self._sym_production: name_of[target]}) 
+                              for state, target in self.targets().items())
+         return chain
 
 
    class Accept(object):
@@ -172,6 +244,9 @@ class Driver(DriverInterface):
       def eval(self, _stack_of_states, _goto_table, _synthesized):
          pass
       
+      def production_str(self):
+         return str(self)
+
       @classmethod
       def request_token(cls): 
          return False
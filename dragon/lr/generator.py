@@ -0,0 +1,130 @@
+'''This module contains a generator of Python modules with the parsing 
+   tables as literals, so a parser can be loaded importing that module 
+   instead of building its tables.
+   See the function write_module in this module.
+   '''
+#########################################################################
+#                                                                       #
+#                        This work is licensed under a                  #
+#   CC BY-SA        Creative Commons Attribution-ShareAlike             #
+#                           3.0 Unported License.                       #
+#                                                                       #
+#########################################################################
+
+###############################################################################
+#                                                                             #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS        #
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT          #
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A    #
+#  PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER  #
+#  OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,   #
+#  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,        #
+#  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR         #
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF     #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING       #
+#  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS         #
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.               #
+#                                                                             #
+###############################################################################
+from dragon.lr.driver import Driver
+from dragon.lr.tables import productions
+
+HEADER = '''# This module was generated by dragon (see the module generator).
+# Do not edit it.
+from dragon.lr.tables import ParsingTables
+
+'''
+
+FOOTER = '''
+TABLES = ParsingTables(RULES, ACTION_TABLE, GOTO_TABLE, START_STATE)
+
+def driver(actions):
+   \'\'\'Returns a Driver for these tables whose semantic actions are taken
+      from the mapping 'actions' by the keys of SEMANTICS.\'\'\'
+   return TABLES.driver([None if key is None else 
+                           (key[0], key[1], actions[key[2]]) 
+                              for key in SEMANTICS])
+'''
+
+def _literal_of_table(table):
+   '''Returns the source of the 'table', a dictionary of dictionaries, 
+      with a row per line and the keys sorted.'''
+   rows = []
+   for state in sorted(table):
+      row = table[state]
+      rows.append("   %r: {%s}," % (state, ", ".join("%r: %r" % (key, row[key]) 
+                                                   for key in sorted(row))))
+
+   return "{\n%s\n   }" % "\n".join(rows)
+
+def semantic_keys(grammar):
+   '''Returns, for each production of the 'grammar' (indexed by production
+      id, see the module tables), None if it has the default semantic action
+      or the tuple (count, consume, key) of its semantic definition (see 
+      Grammar.semantic_definition) where 'key' names the semantic action: 
+      the name of the function or, for a lambda, the production like 
+      'E -> E + T'. 
+      
+      Different functions with the same key raise ValueError.'''
+   keys = []
+   action_of = dict()
+   for symbol, alternative in productions(grammar):
+      definition = grammar.semantic_definition(symbol, alternative)
+      if definition is None:
+         keys.append(None)
+         continue
+
+      count, consume, action = definition
+      key = getattr(action, '__name__', '<lambda>')
+      if key == '<lambda>':
+         rule = grammar[symbol][alternative]
+         key = Driver.Reduce(symbol, rule, None, False).production_str()
+
+      if action_of.setdefault(key, action) is not action:
+         raise ValueError("The semantic action of a production of %s has "
+               "the key '%s' of a different action." % (symbol, key))
+
+      keys.append((count, consume, key))
+
+   return keys
+
+def semantic_mapping(grammar):
+   '''Returns the dictionary which maps each key of semantic_keys to its
+      semantic action, the mapping expected by the 'driver' of a generated
+      module.'''
+   return dict((key[2], grammar.semantic_definition(symbol, alternative)[2]) 
+                  for key, (symbol, alternative) in zip(semantic_keys(grammar),
+                                                         productions(grammar))
+                     if key is not None)
+
+def module_source(parsing_tables, grammar):
+   '''Returns the source of a Python module with the 'parsing_tables' (see 
+      the module tables) of the 'grammar' as literals: RULES, ACTION_TABLE, 
+      GOTO_TABLE, START_STATE and SEMANTICS (see semantic_keys), the 
+      ParsingTables built from them (TABLES) and a function 'driver' that 
+      binds them to the semantic actions of a mapping from the keys of
+      SEMANTICS, like {'add': add, 'E -> T': lambda v: v}.
+      '''
+   rules = "(\n%s\n   )" % "\n".join("   %r," % (rule, ) 
+                                          for rule in parsing_tables.rules)
+   semantics = "(\n%s\n   )" % "\n".join("   %r," % (key, ) 
+                                          for key in semantic_keys(grammar))
+   return HEADER + \
+          "RULES = %s\n\n" % rules + \
+          "ACTION_TABLE = %s\n\n" % _literal_of_table(
+                                          parsing_tables.action_table) + \
+          "GOTO_TABLE = %s\n\n" % _literal_of_table(
+                                          parsing_tables.goto_table) + \
+          "START_STATE = %r\n\n" % (parsing_tables.start_state, ) + \
+          "SEMANTICS = %s\n" % semantics + \
+          FOOTER
+
+def write_module(parsing_tables, grammar, path):
+   '''Writes the module with the 'parsing_tables' of the 'grammar' (see 
+      module_source) in the file 'path', like 'calc_tables.py'.
+      
+      Importing that module (or its compiled version) is enough to get a 
+      driver: the grammar is not needed, only the semantic actions by their
+      keys (see semantic_keys), like calc_tables.driver({'add': add}).'''
+   with open(path, 'w') as target:
+      target.write(module_source(parsing_tables, grammar))
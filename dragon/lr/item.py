@@ -24,10 +24,15 @@
 #  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.               #
 #                                                                             #
 ###############################################################################
-from dragon.util import follow, first
+from dragon.util import follow
 
 class Item(object):
    '''See __init__'''
+   __slots__ = ('sym_production', 'alternative', 'position', '_hash')
+
+   # The items of this class are immutable and can be shared between the
+   # states (see the method _shared)
+   flyweight = True
 
    def __init__(self, sym_production, alternative, position):
       '''A item represent a position in the parser. This is codified according
@@ -41,11 +46,22 @@ class Item(object):
          position of the item.
 
          Both parameters, alternative and position, starts from 0.
+
+         The items are compared a lot of times in sets, so its hash is
+         computed only once and the items created by the methods 
+         'item_shifted' and 'next_items' are interned: there is only one 
+         instance of each one by grammar (see the method _shared).
          '''
       self.sym_production = sym_production
       self.alternative = alternative
       self.position = position
+      self._hash = hash(self.key())
    
+   def key(self):
+      '''Returns a tuple which identifies this item. Two items are equal
+         if and only if their keys are equal.'''
+      return (self.sym_production, self.alternative, self.position)
+
    def at_the_end(self, my_alternative, grammar):
       '''Return True if the item is of the form A -> abc* 
          
@@ -64,17 +80,41 @@ class Item(object):
 
       return alternative[self.position]
 
+   def _shared(self, grammar, item):
+      '''Returns the unique instance equal to 'item' for this grammar 
+         (a flyweight) so the sets of items can be compared by identity
+         and each item is allocated once.
+         If the items of this class are mutable ('flyweight' is False), 
+         the same 'item' is returned.'''
+      if not self.flyweight:
+         return item
+
+      return grammar.analysis().intern(item)
+
    def item_shifted(self, grammar):
       '''Given the item A -> abc*Xde, return a new item A -> abcX*de.
          
          Precondition: The initial item must not be of the form A -> abc* .'''
       assert self.next_symbol(grammar)
-      return self.self_factory(self.sym_production, 
-                               self.alternative, 
-                               self.position + 1)
+      if not self.flyweight:
+         return self.self_factory(self.sym_production, 
+                                  self.alternative, 
+                                  self.position + 1)
+
+      memo = grammar.analysis().memo('item_shifted')
+      if self not in memo:
+         memo[self] = self._shared(grammar, self.self_factory(
+                                                self.sym_production, 
+                                                self.alternative, 
+                                                self.position + 1))
+      return memo[self]
 
    def __eq__(self, other):
-      return hash(self) == hash(other)
+      return self is other or (isinstance(other, Item) and \
+            self._hash == other._hash and self.key() == other.key())
+
+   def __ne__(self, other):
+      return not self == other
 
    def self_factory(self, sym_production, alternative, position):
       '''Builds a other item with these parameters.'''
@@ -84,7 +124,21 @@ class Item(object):
       '''At first, given the item A -> abc*Bd, return each alternative of 
          B -> *efg.
          The exact meaning of this method is specified in each overridden 
-         method.'''
+         '_next_items' method.
+         
+         The results are computed once by grammar if the item is a 
+         flyweight.'''
+      if not self.flyweight:
+         return self._next_items(grammar)
+
+      memo = grammar.analysis().memo('next_items')
+      if self not in memo:
+         memo[self] = tuple(self._shared(grammar, item) 
+                                    for item in self._next_items(grammar))
+      return memo[self]
+
+   def _next_items(self, grammar):
+      '''See next_items.'''
       raise NotImplementedError()
 
    def followers(self, grammar):
@@ -94,18 +148,20 @@ class Item(object):
       raise NotImplementedError()
    
    def __hash__(self):
-      raise NotImplementedError()
+      return self._hash
 
 
 class LR0(Item):
    '''See __init__ of the Item class.'''
+   __slots__ = ()
+
    def __init__(self, sym_production, alternative, position):
       Item.__init__(self, sym_production, alternative, position)
 
    def self_factory(self, sym_production, alternative, position):
       return LR0(sym_production, alternative, position)
 
-   def next_items(self, grammar):
+   def _next_items(self, grammar):
       '''Given the item A -> abc*Bd, return each alternative of B -> *efg.
          Return a empty list if B is not a production or not exist B.'''
       alternative = grammar[self.sym_production][self.alternative]
@@ -123,23 +179,28 @@ class LR0(Item):
    def followers(self, grammar):
       return follow(grammar, self.sym_production)
 
-   def __hash__(self):
-      return hash((self.sym_production, self.alternative, self.position))
-
 
 class LR1(LR0):
    '''This implements an Item for the LR1 parsers. 
       See __init__ of the Item class for a description of Item and the
       documentation of the method next_items.
       '''
+   __slots__ = ('lookahead', )
+
    def __init__(self, sym_production, alternative, position, lookahead):
-      LR0.__init__(self, sym_production, alternative, position)
       self.lookahead = lookahead
+      LR0.__init__(self, sym_production, alternative, position)
+
+   def key(self):
+      return (self.sym_production, 
+              self.alternative, 
+              self.position, 
+              self.lookahead)
 
    def self_factory(self, sym_production, alternative, position):
       return LR1(sym_production, alternative, position, self.lookahead)
 
-   def next_items(self, grammar):
+   def _next_items(self, grammar):
       '''Given the item A -> abc*Bd [x], where x is the lookahead terminal, 
          return each alternative of B -> *efg [y], for each 'y' in first(dx).
          Return a empty list if B is not a production or not exist B.'''
@@ -150,65 +211,146 @@ class LR1(LR0):
       next_sym_production = alternative[self.position]
       if grammar.is_a_nonterminal(next_sym_production):
          result = []
-         first_set = first(grammar, alternative[self.position + 1:] + \
-                                                            (self.lookahead,)) 
+         first_set, nullable = grammar.analysis().suffix_first(
+               self.sym_production, 
+               self.alternative, 
+               self.position + 1)
+         alternatives = range(len(grammar[next_sym_production]))
          for terminal in first_set:
             result.extend([LR1(next_sym_production, i, 0, terminal) 
-                           for i in range(len(grammar[next_sym_production]))])
+                           for i in alternatives])
          
+         if nullable and self.lookahead not in first_set:
+            result.extend([LR1(next_sym_production, i, 0, self.lookahead) 
+                           for i in alternatives])
+
          return result
       else:
          return []
 
    def followers(self, grammar):
       return frozenset([self.lookahead])
-
-   def __hash__(self):
-      return hash((self.sym_production, 
-                   self.alternative, 
-                   self.position, 
-                   self.lookahead))
    
 
+class _TerminalNumbering(object):
+   '''Numbers the terminals when they are found (like the GrammarAnalysis
+      of dragon.util but without a grammar). Used by the LALR items built 
+      without an analysis: each item graph has its own numbering (shared by
+      the items built from others by self_factory).'''
+
+   def __init__(self):
+      self.terminals = []
+      self._bits = {}
+
+   def mask_of(self, terminals):
+      '''Returns the bitmask of the set of 'terminals', numbering the 
+         terminals not found before.'''
+      mask = 0
+      for terminal in terminals:
+         if terminal not in self._bits:
+            self._bits[terminal] = 1 << len(self.terminals)
+            self.terminals.append(terminal)
+
+         mask |= self._bits[terminal]
+
+      return mask
+
+   def terminals_of(self, mask):
+      '''Returns the set of terminals of the bitmask 'mask'.'''
+      terminals = []
+      while mask:
+         lowest = mask & -mask
+         terminals.append(self.terminals[lowest.bit_length() - 1])
+         mask ^= lowest
+
+      return frozenset(terminals)
+
 class LALR(LR0):
    '''See __init__'''
-   def __init__(self, sym_production, alternative, position):
+   __slots__ = ('_lookaheads', '_new_lookaheads', 'subscribeds', '_analysis')
+
+   # Each LALR item learns its own lookaheads so it can not be shared.
+   flyweight = False
+
+   def __init__(self, sym_production, alternative, position, analysis=None):
       '''The item start as a LR0 item but can learn and register the lookaheads
          as a LR1. In fact, the LALR item can register more than one lookahead 
          so it can be seen as the union of many LR1 items.
+
+         The lookaheads are registered as a bitmask using the numbers of the
+         terminals given by 'analysis' (see GrammarAnalysis in the 
+         dragon.util module) so the propagation of them between the items
+         is done with integer operations. Without an 'analysis', the 
+         terminals are numbered when they are found by a numbering of this
+         item, shared with the items built from it (see self_factory) and
+         with the items subscribed to it (see subscribe).
       '''
       LR0.__init__(self, sym_production, alternative, position)
-      self.lookaheads = set()
-      self.new_lookaheads = set()
-      self.subscribeds = set()
+      self._analysis = analysis if analysis is not None else \
+                                                      _TerminalNumbering()
+      self._lookaheads = 0
+      self._new_lookaheads = 0
+      self.subscribeds = []
+
+   @property
+   def lookaheads(self):
+      '''The set of lookahead terminals registered and propagated.'''
+      if not self._lookaheads:
+         return frozenset()
+
+      return self._analysis.terminals_of(self._lookaheads)
+
+   @property
+   def new_lookaheads(self):
+      '''The set of lookahead terminals registered but not propagated yet.'''
+      if not self._new_lookaheads:
+         return frozenset()
+
+      return self._analysis.terminals_of(self._new_lookaheads)
 
    def close(self):
       '''Close the learning stage. The item can not accept any new lookahead.
       '''
-      assert self.lookaheads
-      assert not self.new_lookaheads
-      del self.new_lookaheads
+      assert self._lookaheads
+      assert not self._new_lookaheads
+      del self._new_lookaheads
       del self.subscribeds
 
    def self_factory(self, sym_production, alternative, position):
-      return LALR(sym_production, alternative, position)
+      return LALR(sym_production, alternative, position, self._analysis)
 
    def add_new(self, lookahead):
       '''Adds a new lookahead terminal.'''
-      if lookahead not in self.lookaheads:
-         self.new_lookaheads.add(lookahead)
+      self.add_new_mask(self._analysis.mask_of((lookahead, )))
    
    def add_news(self, lookaheads):
       '''Adds many news lookahead terminals.'''
-      self.new_lookaheads.update(lookaheads)
-      self.new_lookaheads -= self.lookaheads
+      self.add_new_mask(self._analysis.mask_of(lookaheads))
+
+   def add_new_mask(self, mask):
+      '''Adds the lookahead terminals of the bitmask 'mask'.
+         Returns True if the item had not new lookahead terminals to propagate
+         and now it has.'''
+      was_propagated = not self._new_lookaheads
+      self._new_lookaheads |= mask & ~self._lookaheads
+      return was_propagated and bool(self._new_lookaheads)
 
    def subscribe(self, item_lalr):
       '''Adds a other LALR item as a subscriber of this. 
          The items LALR can be interested in the lookahead terminals of 
          others and learn from them. So each new terminal registred by this 
-         item can be propagated to the subscribers.'''
-      self.subscribeds.add(item_lalr)
+         item can be propagated to the subscribers.
+         
+         A subscriber without an analysis and without lookaheads takes the
+         numbering of this item; otherwise both must use the same one.'''
+      # pylint: disable=W0212
+      if item_lalr._analysis is not self._analysis and \
+            isinstance(item_lalr._analysis, _TerminalNumbering) and \
+            not item_lalr._lookaheads and not item_lalr._new_lookaheads:
+         item_lalr._analysis = self._analysis
+
+      assert item_lalr._analysis is self._analysis
+      self.subscribeds.append(item_lalr)
 
    def propagate(self):
       '''Propagates the new lookahead terminals to the LALR subscribers.
@@ -216,23 +358,28 @@ class LALR(LR0):
          terminal is propagate more than once.
 
          Returns True if some lookahead was propagated, False in other case.'''
-      if self.new_lookaheads:
-         for subscribed in self.subscribeds:
-            subscribed.add_news(self.new_lookaheads)
-
-         self.lookaheads.update(self.new_lookaheads)
-         self.new_lookaheads.clear()
+      if self._new_lookaheads:
+         self.propagate_news()
          return True
 
       return False
 
+   def propagate_news(self):
+      '''Like propagate, but returns the subscribers which must propagate
+         their lookaheads now: the subscribers that had not new lookahead 
+         terminals before and now they have.'''
+      new_lookaheads = self._new_lookaheads
+      if not new_lookaheads:
+         return []
+
+      self._lookaheads |= new_lookaheads
+      self._new_lookaheads = 0
+      return [subscribed for subscribed in self.subscribeds 
+                           if subscribed.add_new_mask(new_lookaheads)]
+
    def followers(self, grammar):
       '''Returns the lookaheads terminals registered. 
          Precondition: The 'close' method must be called before.'''
-      assert not hasattr(self, 'new_lookaheads') and \
-             not hasattr(self, 'subscribed') #its closed
-      return frozenset(self.lookaheads)
-
-   def __hash__(self): #Exactly equal to Item::__hash__
-      return LR0.__hash__(self)
-
+      assert not hasattr(self, '_new_lookaheads') and \
+             not hasattr(self, 'subscribeds') #its closed
+      return self.lookaheads
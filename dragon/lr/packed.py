@@ -0,0 +1,297 @@
+'''This module contains a packed representation of the parsing tables by 
+   row displacement (a comb vector): the rows of a table are overlapped in 
+   a few arrays of integers, so the tables use a few bytes per entry.
+   See the class PackedTables in this module.
+   '''
+#########################################################################
+#                                                                       #
+#                        This work is licensed under a                  #
+#   CC BY-SA        Creative Commons Attribution-ShareAlike             #
+#                           3.0 Unported License.                       #
+#                                                                       #
+#########################################################################
+
+###############################################################################
+#                                                                             #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS        #
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT          #
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A    #
+#  PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER  #
+#  OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,   #
+#  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,        #
+#  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR         #
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF     #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING       #
+#  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS         #
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.               #
+#                                                                             #
+###############################################################################
+from array import array
+from dragon.grammar import Grammar
+from dragon.lr.driver import Driver
+from dragon.lr.compress import terminal_classes
+from dragon.lr.tables import SHIFT, REDUCE
+
+def displace(rows):
+   '''Overlaps the 'rows', a list of dictionaries which map a column number
+      to a value, in a comb vector. 
+      
+      Returns three arrays, 'base', 'check' and 'next': the value of the 
+      column c of the row r is next[base[r] + c] if check[base[r] + c] is r.
+      
+      The rows are placed from the densest to the sparsest, each one in the 
+      first displacement where its columns are free (first fit).
+      '''
+   base = array('i', [0] * len(rows))
+   check = array('i')
+   values = array('i')
+
+   # The first position that could be free, to skip the full prefix.
+   first_free = 0
+   for row_id in sorted(range(len(rows)), key = lambda r: -len(rows[r])):
+      columns = sorted(rows[row_id])
+      if not columns:
+         continue
+
+      while first_free < len(check) and check[first_free] != -1:
+         first_free += 1
+
+      displacement = first_free - columns[0]
+      while any(0 <= displacement + column < len(check) and \
+                  check[displacement + column] != -1 for column in columns):
+         displacement += 1
+
+      size = displacement + columns[-1] + 1
+      if size > len(check):
+         check.extend([-1] * (size - len(check)))
+         values.extend([0] * (size - len(values)))
+
+      for column in columns:
+         check[displacement + column] = row_id
+         values[displacement + column] = rows[row_id][column]
+
+      base[row_id] = displacement
+
+   return base, check, values
+
+
+class PackedTables(object):
+   '''See __init__'''
+
+   def __init__(self, parsing_tables):
+      '''Packs the 'parsing_tables' (see the module tables). The states are
+      renumbered from 0 ('states' maps them to the original states) and the
+      reduced nonterminals are numbered. The columns of the Action table are
+      the classes of terminals ('terminal_ids' maps each terminal to its 
+      class, see the function terminal_classes in the module compress).
+
+      The action of a state is encoded as an integer: a Shift to the state s
+      as s + 1, a Reduce of the production p as -(p + 1) and the Accept as 
+      0. The rows of the Action table are packed by displace; the default 
+      action of each row (see the module compress) is in 'default' (0 if
+      the row has not a default action).
+
+      The Goto table is packed by columns: the most common next state of 
+      each nonterminal is in 'goto_default' and the rest of the column is 
+      packed by displace.
+      '''
+      action_table = parsing_tables.action_table
+      goto_table = parsing_tables.goto_table
+
+      self.states = sorted(set(action_table) | set(goto_table) | 
+                           set([parsing_tables.start_state]))
+      state_id = dict((state, i) for i, state in enumerate(self.states))
+      self.start_state = state_id[parsing_tables.start_state]
+
+      self.rules = parsing_tables.rules
+      self.terminals = sorted(set(terminal for row in action_table.values() 
+                                             for terminal in row 
+                                                if terminal != Driver.DEFAULT))
+      self.terminal_ids = terminal_classes(action_table)
+      self.nonterminals = sorted(set(symbol for symbol, _ in self.rules))
+      self.nonterminal_ids = dict((symbol, i) 
+                                 for i, symbol in enumerate(self.nonterminals))
+
+      self.shift_production = array('i', [0] * len(self.states))
+      self.default = array('i', [0] * len(self.states))
+      rows = [dict() for _ in self.states]
+      for state, row in action_table.items():
+         for terminal, action in row.items():
+            if action[0] == SHIFT:
+               code = state_id[action[1]] + 1
+               self.shift_production[code - 1] = action[2]
+            elif action[0] == REDUCE:
+               code = -(action[1] + 1)
+            else:
+               code = 0
+
+            if terminal == Driver.DEFAULT:
+               self.default[state_id[state]] = code
+            else:
+               rows[state_id[state]][self.terminal_ids[terminal]] = code
+
+      self.base, self.check, self.next = displace(rows)
+
+      columns = [dict() for _ in self.nonterminals]
+      for state, row in goto_table.items():
+         for symbol, next_state in row.items():
+            if symbol in self.nonterminal_ids:
+               columns[self.nonterminal_ids[symbol]][state_id[state]] = \
+                     state_id[next_state]
+
+      self.goto_default = array('i', [0] * len(self.nonterminals))
+      for symbol_id, column in enumerate(columns):
+         if column:
+            targets = sorted(column.values())
+            default = max(targets, key = targets.count)
+            self.goto_default[symbol_id] = default
+            columns[symbol_id] = dict((state, next_state) 
+                  for state, next_state in column.items() 
+                     if next_state != default)
+
+      self.goto_base, self.goto_check, self.goto_next = displace(columns)
+
+   def action_code(self, state, terminal):
+      '''Returns the code of the action of the 'state' for the 'terminal' 
+         or None if there is not an action (the default action, if any, is
+         not considered).'''
+      terminal_id = self.terminal_ids.get(terminal)
+      if terminal_id is None:
+         return None
+
+      index = self.base[state] + terminal_id
+      if 0 <= index < len(self.check) and self.check[index] == state:
+         return self.next[index]
+
+      return None
+
+   def goto(self, state, symbol):
+      '''Returns the next state from the 'state' by the nonterminal 
+         'symbol'.'''
+      symbol_id = self.nonterminal_ids[symbol]
+      index = self.goto_base[symbol_id] + state
+      if 0 <= index < len(self.goto_check) and \
+            self.goto_check[index] == symbol_id:
+         return self.goto_next[index]
+
+      return self.goto_default[symbol_id]
+
+   def nbytes(self):
+      '''Returns the number of bytes of the arrays of the tables.'''
+      return sum(len(values) * values.itemsize for values in (
+                  self.base, self.check, self.next, self.default, 
+                  self.shift_production, self.goto_default, 
+                  self.goto_base, self.goto_check, self.goto_next))
+
+   def bind(self, semantic_actions):
+      '''Returns the Action and Goto tables and the id of the start state
+         like ParsingTables.bind (see the module tables), but the tables
+         are views of the packed arrays, used directly by the Driver.'''
+      reduces = [Driver.Reduce(symbol, rule, semantic_definition, 
+                               Grammar.is_empty_rule(rule))
+                  for (symbol, rule), semantic_definition in zip(self.rules, 
+                                                            semantic_actions)]
+      actions = _PackedActions(self, reduces)
+      return (_PackedTable(len(self.states), 
+                           lambda state: _PackedActionRow(actions, state)),
+              _PackedTable(len(self.states), 
+                           lambda state: _PackedGotoRow(self, state)),
+              self.start_state)
+
+   def driver(self, semantic_actions):
+      '''Returns a Driver with these tables bound to the 'semantic_actions'
+         (see the method bind).'''
+      return Driver(*self.bind(semantic_actions))
+
+
+class _PackedActions(object):
+   '''The actions (Driver objects) of the codes of a PackedTables.'''
+
+   def __init__(self, tables, reduces):
+      self.tables = tables
+      self._reduces = reduces
+      self._shifts = dict()
+      self._accept = Driver.Accept()
+
+   def of(self, code):
+      '''Returns the action of the 'code'.'''
+      if code < 0:
+         return self._reduces[-code - 1]
+
+      if code == 0:
+         return self._accept
+
+      if code not in self._shifts:
+         symbol, rule = self.tables.rules[
+                              self.tables.shift_production[code - 1]]
+         self._shifts[code] = Driver.Shift(code - 1, symbol, rule)
+
+      return self._shifts[code]
+
+
+class _PackedTable(object):
+   '''A table of rows built on demand by 'row_of'.'''
+
+   def __init__(self, count, row_of):
+      self._count = count
+      self._row_of = row_of
+
+   def __getitem__(self, state):
+      if not 0 <= state < self._count:
+         raise KeyError(state)
+
+      return self._row_of(state)
+
+   def __contains__(self, state):
+      return 0 <= state < self._count
+
+   def __len__(self):
+      return self._count
+
+
+class _PackedActionRow(object):
+   '''A row of the Action table of a PackedTables.'''
+   __slots__ = ('_actions', '_state')
+
+   def __init__(self, actions, state):
+      self._actions = actions
+      self._state = state
+
+   def __contains__(self, terminal):
+      if terminal == Driver.DEFAULT:
+         return self._actions.tables.default[self._state] != 0
+
+      return self._actions.tables.action_code(self._state, terminal) \
+                                                               is not None
+
+   def __getitem__(self, terminal):
+      if terminal == Driver.DEFAULT:
+         code = self._actions.tables.default[self._state] or None
+      else:
+         code = self._actions.tables.action_code(self._state, terminal)
+
+      if code is None:
+         raise KeyError(terminal)
+
+      return self._actions.of(code)
+
+   def keys(self):
+      # pylint: disable=C0111
+      keys = [terminal for terminal in self._actions.tables.terminals 
+                           if terminal in self]
+      if Driver.DEFAULT in self:
+         keys.append(Driver.DEFAULT)
+
+      return keys
+
+
+class _PackedGotoRow(object):
+   '''A row of the Goto table of a PackedTables.'''
+   __slots__ = ('_tables', '_state')
+
+   def __init__(self, tables, state):
+      self._tables = tables
+      self._state = state
+
+   def __getitem__(self, symbol):
+      return self._tables.goto(self._state, symbol)
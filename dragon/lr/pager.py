@@ -0,0 +1,169 @@
+'''This module contains the construction of a minimal LR(1) automaton by 
+   the method of Pager: the LR(1) states with the same core are merged 
+   when the merge can not introduce new conflicts (weak compatibility).
+   See the function build_parsing_table_pager in this module.
+   '''
+#########################################################################
+#                                                                       #
+#                        This work is licensed under a                  #
+#   CC BY-SA        Creative Commons Attribution-ShareAlike             #
+#                           3.0 Unported License.                       #
+#                                                                       #
+#########################################################################
+
+###############################################################################
+#                                                                             #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS        #
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT          #
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A    #
+#  PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER  #
+#  OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,   #
+#  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,        #
+#  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR         #
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF     #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING       #
+#  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS         #
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.               #
+#                                                                             #
+###############################################################################
+import collections
+from dragon.lr.compact import Encoding, CompactState, populate_tables
+from dragon.lr.item import LR1
+
+def weakly_compatible(lookaheads, other_lookaheads):
+   '''Returns True if two kernels with the same cores, whose lookaheads
+      (bitmasks) are 'lookaheads' and 'other_lookaheads' (in the same order of
+      the cores), are weakly compatible: for each pair of items i and j, 
+      the lookaheads of i in one kernel do not intersect the lookaheads of j
+      in the other, or the lookaheads of i and j already intersect in one of
+      the kernels.
+
+      If the kernels are weakly compatible, the state built by their union
+      has not a Reduce-Reduce conflict that the states had not before.
+      '''
+   for i in range(len(lookaheads)):
+      for j in range(i + 1, len(lookaheads)):
+         if not (lookaheads[i] & other_lookaheads[j]) and \
+               not (lookaheads[j] & other_lookaheads[i]):
+            continue
+
+         if not (lookaheads[i] & lookaheads[j]) and \
+               not (other_lookaheads[i] & other_lookaheads[j]):
+            return False
+
+   return True
+
+
+def _reachable(states):
+   '''Removes the 'states' that can not be reached from the first one, 
+      renumbering the transitions of the rest.'''
+   index_by_old = {0: 0}
+   to_process = [0]
+   while to_process:
+      for next_index in states[to_process.pop()].transitions.values():
+         if next_index not in index_by_old:
+            index_by_old[next_index] = len(index_by_old)
+            to_process.append(next_index)
+
+   reachable = [None] * len(index_by_old)
+   for old_index, index in index_by_old.items():
+      state = states[old_index]
+      for symbol, next_index in state.transitions.items():
+         state.transitions[symbol] = index_by_old[next_index]
+
+      reachable[index] = state
+
+   return reachable
+
+
+# pylint: disable=R0914
+def pager_automaton(encoding, start_kernel):
+   '''Builds the LR(1) automaton from the 'start_kernel' (a sorted tuple of
+      pairs (core, lookaheads), see CompactState in the module compact) but 
+      a new kernel is merged with a state with the same cores if both are 
+      weakly compatible (see weakly_compatible).
+
+      When a state learns new lookaheads, it is processed again so the 
+      lookaheads are propagated to its successors. Some states can be left 
+      unreachable in the process: they are removed at the end.
+
+      Returns a list of CompactState, being the first the start state.
+      '''
+   states = [CompactState(start_kernel)]
+   indexes_by_cores = collections.defaultdict(list)
+   indexes_by_cores[tuple(core for core, _ in start_kernel)].append(0)
+   to_process = [0]
+   pending = set(to_process)
+
+   while to_process:
+      index = to_process.pop()
+      pending.discard(index)
+      state = states[index]
+
+      state.reductions = []
+      groups = collections.defaultdict(list)
+      for core, lookaheads in encoding.lr1_closure(state.kernel).items():
+         next_symbol = encoding.next_symbol[core]
+         if next_symbol is None:
+            state.reductions.append((core // encoding.stride, lookaheads))
+         else:
+            groups[next_symbol].append((core + 1, lookaheads))
+
+      for next_symbol, group in groups.items():
+         kernel = tuple(sorted(group))
+         cores = tuple(core for core, _ in kernel)
+         lookaheads = tuple(mask for _, mask in kernel)
+
+         # The current successor is tried first so a state processed 
+         # again keeps its transitions if it is possible.
+         candidates = indexes_by_cores[cores]
+         current = state.transitions.get(next_symbol)
+         if current in candidates:
+            candidates = [current] + candidates
+
+         for candidate in candidates:
+            candidate_kernel = states[candidate].kernel
+            if weakly_compatible(
+                  tuple(mask for _, mask in candidate_kernel), lookaheads):
+               merged = tuple((core, mask | other_mask) 
+                  for (core, mask), other_mask in zip(candidate_kernel, 
+                                                      lookaheads))
+               if merged != candidate_kernel:
+                  states[candidate].kernel = merged
+                  if candidate not in pending:
+                     pending.add(candidate)
+                     to_process.append(candidate)
+
+               break
+
+         else:
+            candidate = len(states)
+            states.append(CompactState(kernel))
+            indexes_by_cores[cores].append(candidate)
+            pending.add(candidate)
+            to_process.append(candidate)
+
+         state.transitions[next_symbol] = candidate
+
+   return _reachable(states)
+
+
+def build_parsing_table_pager(grammar, start_item, 
+      handle_shift_reduce = True, disable_mapping = False):
+   '''Builds the Action and Goto tables like build_parsing_table (see the
+      module builder) for a LR1 'start_item', but the automaton is the 
+      minimal LR(1) automaton built by pager_automaton: the tables have the 
+      power of the canonical LR(1) tables, with a number of states near to 
+      the number of states of the LALR tables.
+
+      If the 'start_item' is not a LR1 item, its lookahead is the EOF
+      terminal.
+      '''
+   encoding = Encoding(grammar)
+   start_core = encoding.core(start_item)
+   lookahead = start_item.lookahead if isinstance(start_item, LR1) \
+                                    else grammar.EOF
+   start_kernel = ((start_core, encoding.mask_of([lookahead])), )
+   states = pager_automaton(encoding, start_kernel)
+   return populate_tables(grammar, encoding, states, start_core, 
+         handle_shift_reduce, disable_mapping)
@@ -0,0 +1,136 @@
+'''This module contains the ParsingTables class, the Action and Goto tables
+   as pure data (integers, symbols and production ids) without the semantic 
+   actions, so they can be pickled, cached and shared between processes.
+   See the documentation of ParsingTables.
+   '''
+#########################################################################
+#                                                                       #
+#                        This work is licensed under a                  #
+#   CC BY-SA        Creative Commons Attribution-ShareAlike             #
+#                           3.0 Unported License.                       #
+#                                                                       #
+#########################################################################
+
+###############################################################################
+#                                                                             #
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS        #
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT          #
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A    #
+#  PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT OWNER  #
+#  OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,   #
+#  EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,        #
+#  PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR         #
+#  PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF     #
+#  LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING       #
+#  NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS         #
+#  SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.               #
+#                                                                             #
+###############################################################################
+from dragon.grammar import Grammar
+from dragon.lr.driver import Driver
+
+SHIFT, REDUCE, ACCEPT = range(3)
+
+def productions(grammar):
+   '''Returns the productions of the 'grammar' as a list of pairs 
+      (symbol, alternative) in a stable order: the nonterminals are sorted.
+      The index of a production in this list is its id.'''
+   return [(symbol, alternative) 
+               for symbol in sorted(grammar.iter_nonterminals())
+                  for alternative in range(len(grammar[symbol]))]
+
+def semantic_actions(grammar):
+   '''Returns the semantic-action vector of the 'grammar': the semantic 
+      definition (see Grammar.semantic_definition) of each production, 
+      indexed by production id (see the function productions).'''
+   return [grammar.semantic_definition(symbol, alternative) 
+               for symbol, alternative in productions(grammar)]
+
+
+class ParsingTables(object):
+   '''See __init__'''
+
+   def __init__(self, rules, action_table, goto_table, start_state):
+      '''The Action and Goto tables and the id of the start state as pure 
+         data.
+
+         The 'rules' are the pairs (symbol, rule) of each production, 
+         indexed by production id. Each action of the 'action_table' is a 
+         tuple (SHIFT, next state, production id), (REDUCE, production id) 
+         or (ACCEPT, ). 
+         
+         The semantic actions are attached later, when the tables are bound
+         to a semantic-action vector (see the method bind).
+         '''
+      self.rules = rules
+      self.action_table = action_table
+      self.goto_table = goto_table
+      self.start_state = start_state
+
+   @classmethod
+   def from_tables(cls, grammar, tables):
+      '''Builds the ParsingTables from the 'tables' of the 'grammar' (the 
+         Action and Goto tables and the id of the start state returned by 
+         build_parsing_table, see the module builder).
+         
+         The Driver.ChainReduce actions cannot be stored as data (their 
+         chains are not kept) so they raise ValueError: the unit reductions
+         must be bypassed after the tables are bound.'''
+      action_table, goto_table, start_state = tables
+      rules = []
+      ids = dict()
+      for symbol, alternative in productions(grammar):
+         rule = grammar[symbol][alternative]
+         ids[Driver.Reduce(symbol, rule, None, False).production_str()] = \
+               len(rules)
+         rules.append((symbol, rule))
+
+      data_table = dict()
+      for state, row in action_table.items():
+         data_row = data_table[state] = dict()
+         for terminal, action in row.items():
+            if isinstance(action, Driver.Shift):
+               data_row[terminal] = (SHIFT, goto_table[state][terminal], 
+                                     ids[action.production_str()])
+            elif isinstance(action, Driver.ChainReduce):
+               raise ValueError("The ChainReduce of %s in the state %s "
+                     "cannot be stored, bypass the unit reductions after "
+                     "the tables are bound." % (action.production_str(), 
+                                                 state))
+            elif isinstance(action, Driver.Reduce):
+               data_row[terminal] = (REDUCE, ids[action.production_str()])
+            else:
+               data_row[terminal] = (ACCEPT, )
+
+      return cls(rules, data_table, goto_table, start_state)
+
+   def bind(self, semantic_actions):
+      '''Returns the Action and Goto tables and the id of the start state
+         ready to be used by a driver (see the module driver), where the 
+         Reduce actions execute the semantic definitions of 
+         'semantic_actions', a vector indexed by production id (see the 
+         function semantic_actions).'''
+      reduces = [Driver.Reduce(symbol, rule, semantic_definition, 
+                               Grammar.is_empty_rule(rule))
+                  for (symbol, rule), semantic_definition in zip(self.rules, 
+                                                            semantic_actions)]
+      accept = Driver.Accept()
+
+      action_table = dict()
+      for state, data_row in self.action_table.items():
+         row = action_table[state] = dict()
+         for terminal, data_action in data_row.items():
+            if data_action[0] == SHIFT:
+               symbol, rule = self.rules[data_action[2]]
+               row[terminal] = Driver.Shift(data_action[1], symbol, rule)
+            elif data_action[0] == REDUCE:
+               row[terminal] = reduces[data_action[1]]
+            else:
+               row[terminal] = accept
+
+      return action_table, self.goto_table, self.start_state
+
+   def driver(self, semantic_actions):
+      '''Returns a Driver with these tables bound to the 'semantic_actions'
+         (see the method bind).'''
+      return Driver(*self.bind(semantic_actions))
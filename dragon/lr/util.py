@@ -57,6 +57,24 @@ def goto(items, symbol, grammar, only_kernel = False):
    return closure(to_process, grammar) if not only_kernel else to_process
 
 
+def gotos(items, grammar):
+   '''Like 'goto' but for all the symbols at once: the items are grouped by
+      the symbol that follows the position of each item in only one pass.
+      
+      Returns a dictionary which maps each of these symbols to the kernel
+      items obtained shifting the items of the group (see 'goto' with the 
+      'only_kernel' parameter set to True).
+      Symbols without items, which would yield an empty 'goto', are not
+      included.'''
+   groups = dict()
+   for item in items:
+      symbol = item.next_symbol(grammar)
+      if symbol:
+         groups.setdefault(symbol, []).append(item.item_shifted(grammar))
+
+   return dict((symbol, frozenset(group)) for symbol, group in groups.items())
+
+
 def canonical_collection(grammar, start_item):
    '''The collection represents a collections of 'states' of the parser where
       each 'state' is a set of items.
@@ -70,9 +88,9 @@ def canonical_collection(grammar, start_item):
 
    while to_process:
       _set = to_process.pop()
-      for symbol in grammar.iter_on_all_symbols():
-         next_set = goto(_set, symbol, grammar)
-         if next_set and next_set not in collection:
+      for next_kernel in gotos(_set, grammar).values():
+         next_set = closure(next_kernel, grammar)
+         if next_set not in collection:
             to_process.append(next_set)
 
       collection.add(_set)
@@ -92,9 +110,8 @@ def kernel_collection(grammar, start_item):
    while to_process:
       kernel_set = to_process.pop()
       _set = closure(kernel_set, grammar)
-      for symbol in grammar.iter_on_all_symbols():
-         next_set = goto(_set, symbol, grammar, only_kernel=True)
-         if next_set and next_set not in collection:
+      for next_set in gotos(_set, grammar).values():
+         if next_set not in collection:
             to_process.append(next_set)
 
       collection.add(kernel_set)
@@ -102,3 +119,41 @@ def kernel_collection(grammar, start_item):
    return frozenset(collection)
 
 
+class State(object):
+   '''See __init__'''
+
+   def __init__(self, kernel, items):
+      '''A state of the LR automaton. It contains the 'kernel' items, 
+         the closure of them ('items') and the 'transitions' to other states, 
+         a dictionary which maps each symbol to the next State.
+         '''
+      self.kernel = kernel
+      self.items = items
+      self.transitions = dict()
+
+
+def automaton(grammar, start_item):
+   '''Builds the states of the parser like 'kernel_collection' but recording
+      the closure of each state and its transitions, so each state is 
+      computed only once.
+      
+      Returns a list of State objects where the first is the start state.
+      '''
+   start_kernel = frozenset([start_item])
+   start_state = State(start_kernel, closure(start_kernel, grammar))
+   state_by_kernel = {start_kernel: start_state}
+   states = [start_state]
+   to_process = [start_state]
+
+   while to_process:
+      state = to_process.pop()
+      for symbol, next_kernel in gotos(state.items, grammar).items():
+         if next_kernel not in state_by_kernel:
+            next_state = State(next_kernel, closure(next_kernel, grammar))
+            state_by_kernel[next_kernel] = next_state
+            states.append(next_state)
+            to_process.append(next_state)
+
+         state.transitions[symbol] = state_by_kernel[next_kernel]
+
+   return states
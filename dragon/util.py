@@ -1,5 +1,5 @@
 '''This module contains the two basic tools for parsing called First and
-   Follow functions.
+   Follow functions and the GrammarAnalysis class which caches them.
    See the documentation of each one.
    '''
 #########################################################################
@@ -26,7 +26,291 @@
 #                                                                             #
 ###############################################################################
 
-# pylint: disable=R0912
+class GrammarAnalysis(object):
+   '''See __init__'''
+
+   def __init__(self, a_grammar):
+      '''Computes once the 'first' set and the 'nullable' property of each
+         nonterminal of 'a_grammar' so the rest of the queries can be 
+         answered without running again a fixed-point algorithm.
+
+         Each terminal is numbered, so a set of terminals is represented
+         internally as an integer, a bitmask, where the terminal number 'i'
+         is in the set if the bit 1 << i is set. The union, intersection
+         and difference of sets are then single integer operations.
+         The methods with the suffix '_mask' return these bitmasks; the 
+         rest of the methods return sets of terminals.
+
+         The analysis is a snapshot of the grammar: if the grammar changes,
+         a new analysis must be built. The Grammar class does this 
+         automatically (see the method 'analysis' of Grammar).
+         '''
+      self._grammar = a_grammar
+      self._first = dict()
+      self._nullable = set()
+      self._follow = None
+      self._suffixes = None
+      self._memos = dict()
+
+      self._number_terminals()
+      self._build_first_and_nullable()
+
+   def memo(self, name):
+      '''Returns a dictionary, identified by 'name', where other modules
+         can store data derived from this grammar. 
+         Like the rest of the analysis, the dictionaries are discarded when 
+         the grammar is modified.'''
+      if name not in self._memos:
+         self._memos[name] = dict()
+
+      return self._memos[name]
+
+   def intern(self, obj):
+      '''Returns the unique instance equal to 'obj' between the objects 
+         interned in this analysis, so equal objects derived from this 
+         grammar (like the items of a parser) can be shared.'''
+      return self.memo('intern').setdefault(obj, obj)
+
+   def _number_terminals(self):
+      '''Numbers the terminals of the grammar, the special terminals EOF and 
+         PROBE and any other symbol used in a rule that it is not a 
+         nonterminal. The terminals are sorted so the numbers are stable.'''
+      a_grammar = self._grammar
+      terminals = set([a_grammar.EOF, a_grammar.PROBE])
+      for symbol in a_grammar.iter_on_all_symbols():
+         if not a_grammar.is_a_nonterminal(symbol):
+            terminals.add(symbol)
+
+      for symbol in a_grammar.iter_nonterminals():
+         for rule in a_grammar[symbol]:
+            terminals.update(sym for sym in rule 
+                  if not a_grammar.is_a_nonterminal(sym) and \
+                     not a_grammar.is_empty(sym))
+
+      self.terminals = tuple(sorted(terminals))
+      self._bits = dict((terminal, 1 << i) 
+                           for i, terminal in enumerate(self.terminals))
+
+   def terminal_id(self, terminal):
+      '''Returns the number of the 'terminal'.'''
+      return self._bits[terminal].bit_length() - 1
+
+   def mask_of(self, terminals):
+      '''Returns the bitmask of the set of 'terminals'.'''
+      mask = 0
+      for terminal in terminals:
+         mask |= self._bits[terminal]
+
+      return mask
+
+   def terminals_of(self, mask):
+      '''Returns the set of terminals of the bitmask 'mask'.'''
+      terminals = []
+      while mask:
+         lowest = mask & -mask
+         terminals.append(self.terminals[lowest.bit_length() - 1])
+         mask ^= lowest
+
+      return frozenset(terminals)
+
+   def _build_first_and_nullable(self):
+      '''Runs the classic fixed-point algorithm over all the productions:
+         a nonterminal is nullable if one of its rules has only nullable 
+         symbols, and the 'first' of a rule is the union of the 'first' of 
+         each symbol until a non-nullable symbol is found.'''
+      a_grammar = self._grammar
+      first_masks = self._first
+      nullable = self._nullable
+
+      for symbol in a_grammar.iter_nonterminals():
+         first_masks[symbol] = 0
+
+      changes = True
+      while changes:
+         changes = False
+         for symbol in a_grammar.iter_nonterminals():
+            first_mask = first_masks[symbol]
+            for rule in a_grammar[symbol]:
+               for sym in rule:
+                  if a_grammar.is_empty(sym):
+                     continue
+
+                  first_mask |= self.first_of_symbol_mask(sym)
+                  if sym not in nullable:
+                     break
+
+               else:
+                  if symbol not in nullable:
+                     nullable.add(symbol)
+                     changes = True
+
+            if first_mask != first_masks[symbol]:
+               first_masks[symbol] = first_mask
+               changes = True
+
+   def is_nullable(self, symbol):
+      '''Returns True if 'symbol' derives in the empty string.'''
+      return symbol in self._nullable or self._grammar.is_empty(symbol)
+
+   def first_of_symbol_mask(self, symbol):
+      '''Returns the 'first' set of a single symbol without the EMPTY 
+         terminal. For a terminal, this is the terminal itself.'''
+      if symbol in self._first:
+         return self._first[symbol]
+      
+      if self._grammar.is_empty(symbol):
+         return 0
+
+      return self._bits[symbol]
+
+   def first_of_symbol(self, symbol):
+      '''Like first_of_symbol_mask but returns a set of terminals.'''
+      return self.terminals_of(self.first_of_symbol_mask(symbol))
+
+   def first_mask(self, symbols):
+      '''Returns a pair with the 'first' set of the sequence 'symbols', 
+         as a bitmask and without the EMPTY terminal, and True if all the 
+         symbols derive in the empty string.'''
+      first_mask = 0
+      for symbol in symbols:
+         first_mask |= self.first_of_symbol_mask(symbol)
+         if not self.is_nullable(symbol):
+            return first_mask, False
+
+      return first_mask, True
+
+   def first(self, symbols):
+      '''Returns the 'first' set of the sequence 'symbols' including
+         the EMPTY terminal if all the symbols derive in the empty string.
+         See the function 'first' in this module.'''
+      first_mask, nullable = self.first_mask(symbols)
+      first_set = self.terminals_of(first_mask)
+      if nullable:
+         return first_set | frozenset([self._grammar.EMPTY])
+
+      return first_set
+
+   def _build_follow(self):
+      '''Computes the 'follow' set of every nonterminal in one pass.
+         
+         First, each occurrence of a nonterminal X in a rule A -> aXb 
+         contributes with the 'first of b' to the 'follow of X' and, if 'b' 
+         derives in the empty string, X 'includes' A: the 'follow of A' is 
+         in the 'follow of X'.
+         Then, the terminals are propagated through the 'includes' relation 
+         using a worklist until no more terminals are added.
+         
+         Like the function 'follow', the rules of the augmented start symbol
+         are ignored and the EOF terminal follows the start symbol.'''
+      a_grammar = self._grammar
+      follow_masks = dict()
+      included_by = dict()
+      for symbol in a_grammar.iter_nonterminals():
+         follow_masks[symbol] = 0
+         included_by[symbol] = set()
+
+      follow_masks[a_grammar.start_symbol()] = self._bits[a_grammar.EOF]
+
+      for sym in a_grammar.iter_nonterminals():
+         if a_grammar.is_augmented_start_symbol(sym):
+            continue
+
+         for alternative, rule in enumerate(a_grammar[sym]):
+            for i, target in enumerate(rule):
+               if target not in follow_masks:
+                  continue
+
+               first_mask, nullable = self.suffix_first_mask(sym, 
+                                                             alternative, 
+                                                             i + 1)
+               follow_masks[target] |= first_mask
+               if nullable and sym != target:
+                  included_by[sym].add(target)
+
+      worklist = [symbol for symbol in follow_masks if follow_masks[symbol]]
+      while worklist:
+         symbol = worklist.pop()
+         for target in included_by[symbol]:
+            if follow_masks[symbol] & ~follow_masks[target]:
+               follow_masks[target] |= follow_masks[symbol]
+               worklist.append(target)
+
+      self._follow = follow_masks
+
+   def follow_mask(self, symbol):
+      '''Returns the 'follow' set of the nonterminal 'symbol' as a bitmask.
+         See the function 'follow' in this module.
+         
+         All the 'follow' sets are computed the first time that this method
+         is called.
+
+         Precondition: the grammar must be a grammar augmented.'''
+      if self._follow is None:
+         self._build_follow()
+
+      return self._follow.get(symbol, 0)
+
+   def follow(self, symbol):
+      '''Like follow_mask but returns a set of terminals.'''
+      return self.terminals_of(self.follow_mask(symbol))
+
+   def _build_suffixes(self):
+      '''For each rule A -> X1 X2 ... Xn precomputes, from right to left,
+         the 'first' set (without the EMPTY terminal) of each suffix 
+         Xi ... Xn and if that suffix derives in the empty string.'''
+      a_grammar = self._grammar
+      self._suffixes = dict()
+      for symbol in a_grammar.iter_nonterminals():
+         for alternative, rule in enumerate(a_grammar[symbol]):
+            suffixes = [(0, True)]
+            for sym in reversed(rule):
+               first_mask, nullable = suffixes[-1]
+               if self.is_nullable(sym):
+                  suffixes.append((self.first_of_symbol_mask(sym) | first_mask,
+                                   nullable))
+               else:
+                  suffixes.append((self.first_of_symbol_mask(sym), False))
+
+            suffixes.reverse()
+            self._suffixes[(symbol, alternative)] = tuple(suffixes)
+
+   def suffix_first_mask(self, symbol, alternative, position):
+      '''Returns a pair with the 'first' set (without the EMPTY terminal) 
+         of the suffix that starts at 'position' in the rule number 
+         'alternative' of 'symbol', as a bitmask, and True if that suffix 
+         derives in the empty string (or if it is empty).
+
+         That is, for the rule A -> abBcd, the suffix of the position 2 is
+         Bcd.
+
+         The suffixes of all the rules are computed the first time that 
+         this method is called.'''
+      if self._suffixes is None:
+         self._build_suffixes()
+
+      return self._suffixes[(symbol, alternative)][position]
+
+   def suffix_first(self, symbol, alternative, position):
+      '''Like suffix_first_mask but the 'first' set is a set of terminals.'''
+      memo = self.memo('suffix_first')
+      key = (symbol, alternative, position)
+      if key not in memo:
+         first_mask, nullable = self.suffix_first_mask(symbol, 
+                                                       alternative, 
+                                                       position)
+         memo[key] = (self.terminals_of(first_mask), nullable)
+
+      return memo[key]
+
+   def first_is_nullable(self, symbols):
+      '''Returns True if all the 'symbols' derive in the empty string.'''
+      for symbol in symbols:
+         if not self.is_nullable(symbol):
+            return False
+
+      return True
+
+
 def first(a_grammar, symbols):
    '''Finds the 'first' set of terminals that there are derived from 'symbols'.
          
@@ -41,70 +325,13 @@ def first(a_grammar, symbols):
         add the EMPTY terminal to the set 'first of 'symbols'.
 
       This algorithm works for left and right recursive grammars.
+      The 'first' set of each nonterminal is computed only once by grammar
+      (see the class GrammarAnalysis in this module).
       '''
-      
-   symbol_derive_empty = set()
-   first_set = set()
-   previous_first_set = set()
-   
-   # pylint: disable=C0103
-   previous_len_symbol_derive_empty = -1
-   while len(previous_first_set) < len(first_set.union(previous_first_set)) \
-         or previous_len_symbol_derive_empty < len(symbol_derive_empty):
-
-      previous_first_set = first_set.union(previous_first_set)
-      previous_len_symbol_derive_empty = len(symbol_derive_empty)
-
-      stack_of_rules = [[list(symbols)]]
-      first_set = set()
-      seen = set()
-      while True:
-         rules = stack_of_rules[-1]
-         if not rules:
-            del stack_of_rules[-1]
-            if a_grammar.EMPTY in first_set:
-               if stack_of_rules and len(stack_of_rules[-1][0]) > 1:
-                  first_set.remove(a_grammar.EMPTY)
-               
-               if stack_of_rules and stack_of_rules[-1][0]:
-                  symbol_derive_empty.add(stack_of_rules[-1][0][0])
-                  del stack_of_rules[-1][0][0]
-
-
-               if not stack_of_rules:
-                  break
-            else:
-               if stack_of_rules:
-                  del stack_of_rules[-1][0]
-               else:
-                  break
-            continue
-
-         rule = rules[0]
-         if not rule:
-            del stack_of_rules[-1][0]
-            continue
-
-         s = rule[0]
+   return a_grammar.analysis().first(symbols)
 
-         if a_grammar.is_a_terminal(s) or a_grammar.is_empty(s):
-            first_set.add(s)
-            del stack_of_rules[-1][0]
-         elif s not in seen:
-            seen.add(s)
-            stack_of_rules.append([list(rule) for rule in a_grammar[s]])
-         else:
-            if s in symbol_derive_empty:
-               del stack_of_rules[-1][0][0]
-               if not stack_of_rules[-1][0]:
-                  first_set.add(a_grammar.EMPTY)
-            else:
-               del stack_of_rules[-1][0]
 
-   return frozenset(first_set)
-
-
-def follow(a_grammar, symbol, _seen = None):
+def follow(a_grammar, symbol):
    '''Returns the set of terminals that 'follow' the nonterminal symbol 
       'symbol'.
       
@@ -117,38 +344,8 @@ def follow(a_grammar, symbol, _seen = None):
 
       Precondition: the grammar must be a grammar augmented.
 
-      The optional parameter '_seen' is a special parameter for internal 
-      use only.
-      This algorithm works in a recursive way, for both left and right 
-      recursive grammars.
+      The 'follow' sets of all the nonterminals are computed together, only
+      once by grammar (see the class GrammarAnalysis in this module).
+      This algorithm works for both left and right recursive grammars.
       '''
-
-   target = symbol
-
-   follow_set = set()
-   _seen = _seen if _seen else set()
-   _seen.add(symbol)
-   if a_grammar.is_start_symbol(target):
-      follow_set.add(a_grammar.EOF)
-
-   for sym in a_grammar.iter_nonterminals():
-      if not a_grammar.is_augmented_start_symbol(sym):
-         for rule in a_grammar[sym]:
-            while target in rule:
-               tail = rule[rule.index(target) + 1: ]
-               
-               terminals = ()
-               if tail:
-                  terminals = first(a_grammar, tail)
-      
-               more_terminals = ()
-               if (not tail or a_grammar.EMPTY in terminals) and \
-                     sym not in _seen:
-                  more_terminals = follow(a_grammar, sym, _seen)
-
-               follow_set.update(more_terminals)
-               follow_set.update(set(terminals) - set([a_grammar.EMPTY]))
-               rule = rule[rule.index(target)+1 :]
-   
-   assert a_grammar.EMPTY not in follow_set
-   return frozenset(follow_set)
+   return a_grammar.analysis().follow(symbol)
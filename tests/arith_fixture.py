@@ -0,0 +1,48 @@
+'''The fixture shared by the tests of the transformations of the tables: the
+   grammar of the arithmetic expressions and a lexer of a list of tokens.'''
+import unittest
+import dragon.grammar as grammar
+from dragon.driver import Lexer
+from dragon.lr.item import LR1
+
+class ListLexer(Lexer):
+   def __init__(self, tokens):
+      self._tokens = tokens
+
+   def tokenizer(self):
+      for token in self._tokens:
+         yield token
+
+      yield (grammar.Grammar.EOF, None)
+
+
+# The tokens of (2 + 3) * 4 + 1 and the sums done while they are parsed.
+TOKENS = [('(', None), ('id', 2), ('+', None), ('id', 3), (')', None), 
+          ('*', None), ('id', 4), ('+', None), ('id', 1)]
+SUMS = [5, 21]
+
+class ArithTestCase(unittest.TestCase):
+   '''Builds the arithmetic grammar 'arith' whose sums are recorded in 
+      'results' and the LR1 'start_item' of it.'''
+
+   def setUp(self):
+      self.results = []
+      def add(e, t):
+         self.results.append(e + t)
+         return e + t
+
+      self.arith = grammar.Grammar('E', ('+', '*', '(', ')', 'id'))
+
+      self.arith.add_rule('E', ['E', '+', 'T', add])
+      self.arith.add_rule('E', ['T'])
+      self.arith.add_rule('T', ['T', '*', 'F', lambda t, f: t * f])
+      self.arith.add_rule('T', ['F'])
+      self.arith.add_rule('F', ['(', 'E', ')', lambda e: e])
+      self.arith.add_rule('F', ['id'])
+
+      self.start_item = LR1(self.arith.START, 0, 0, self.arith.EOF)
+
+   def assertParsesTheSums(self, driver):
+      '''Parses TOKENS with the 'driver' and checks the SUMS done.'''
+      driver.parse(ListLexer(TOKENS))
+      self.assertTrue(self.results == SUMS)
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+import dragon.grammar as grammar
+from dragon.driver import Lexer
+from dragon.lr.binary import BinaryTables, write_binary
+from dragon.lr.builder import build_parsing_table
+from dragon.lr.item import LR0
+from dragon.lr.tables import ParsingTables, semantic_actions
+
+class FunctionalTestBinaryTables(unittest.TestCase):
+   class ListLexer(Lexer):
+      def __init__(self, tokens):
+         self._tokens = tokens
+
+      def tokenizer(self):
+         for token in self._tokens:
+            yield token
+
+         yield (grammar.Grammar.EOF, None)
+
+   def setUp(self):
+      self.directory = tempfile.mkdtemp()
+      self.path = os.path.join(self.directory, 'arith.tables')
+
+      self.results = []
+      def add(e, t):
+         self.results.append(e + t)
+         return e + t
+
+      self.arith = grammar.Grammar('E', ('+', '*', '(', ')', 'id'))
+
+      self.arith.add_rule('E', ['E', '+', 'T', add])
+      self.arith.add_rule('E', ['T'])
+      self.arith.add_rule('T', ['T', '*', 'F', lambda t, f: t * f])
+      self.arith.add_rule('T', ['F'])
+      self.arith.add_rule('F', ['(', 'E', ')'])
+      self.arith.add_rule('F', ['id'])
+
+      self.tables = build_parsing_table(self.arith, 
+                                        LR0(self.arith.START, 0, 0))
+      write_binary(ParsingTables.from_tables(self.arith, self.tables), 
+                   self.path)
+
+   def tearDown(self):
+      shutil.rmtree(self.directory)
+
+   def test_rows_are_decoded_lazily(self):
+      binary_tables = BinaryTables(self.path)
+      action_table, goto_table, start_state = binary_tables.bind(
+            semantic_actions(self.arith))
+
+      self.assertTrue(start_state == self.tables[2])
+      self.assertTrue(len(action_table) == len(self.tables[0]))
+      self.assertTrue(len(action_table._rows) == 0)
+
+      for state, row in self.tables[0].items():
+         self.assertTrue(action_table[state] == row)
+         self.assertTrue(goto_table[state] == self.tables[1].get(state, {}))
+
+      self.assertRaises(KeyError, action_table.__getitem__, len(action_table))
+      binary_tables.close()
+
+   def test_parse(self):
+      binary_tables = BinaryTables(self.path)
+      driver = binary_tables.driver(semantic_actions(self.arith))
+
+      tokens = [('id', 2), ('*', None), ('id', 3), ('+', None), ('id', 4)]
+      driver.parse(self.ListLexer(tokens))
+      self.assertTrue(self.results == [10])
+      binary_tables.close()
+
+   def test_not_a_file_of_tables(self):
+      with open(self.path, 'wb') as target:
+         target.write('\0' * 64)
+
+      self.assertRaises(ValueError, BinaryTables, self.path)
+
+
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,278 @@
+import unittest
+import dragon.grammar as grammar
+from dragon.lr.builder import build_parsing_table, build_parsing_table_lalr, \
+                              select_algorithm
+from dragon.lr.conflict import ReduceReduce, ShiftReduce
+from dragon.lr.compact import Encoding, build_parsing_table_slr
+from dragon.lr.deremer import digraph
+from dragon.lr.driver import Driver
+from dragon.lr.item import LR0, LR1, LALR
+from dragon.lr.pager import build_parsing_table_pager, weakly_compatible
+from dragon.lr.util import closure
+
+class FunctionalTestBuildCompactTables(unittest.TestCase):
+
+   def setUp(self):
+      self.arith = grammar.Grammar('E', ('+', '*', '(', ')', 'id'))
+
+      self.arith.add_rule('E', ['E', '+', 'T'])
+      self.arith.add_rule('E', ['T'])
+      self.arith.add_rule('T', ['T', '*', 'F'])
+      self.arith.add_rule('T', ['F'])
+      self.arith.add_rule('F', ['(', 'E', ')'])
+      self.arith.add_rule('F', ['id'])
+
+      self.lrvalue = grammar.Grammar('S', ('=', '*', '(', ')', 'id'))
+
+      self.lrvalue.add_rule('S', ['L', '=', 'R'])
+      self.lrvalue.add_rule('S', ['R'])
+      self.lrvalue.add_rule('L', ['*', 'R'])
+      self.lrvalue.add_rule('L', ['id'])
+      self.lrvalue.add_rule('R', ['L'])
+      self.lrvalue.add_rule('R', ['(', 'S', ')'])
+      
+      self.reduce_reduce = grammar.Grammar('S', ('=', '?', '#'))
+
+      self.reduce_reduce.add_rule('S', ['A', '#', '='])
+      self.reduce_reduce.add_rule('S', ['B', '#', '?'])
+      self.reduce_reduce.add_rule('A', ['=', '?'])
+      self.reduce_reduce.add_rule('B', ['=', '?'])
+
+      self.not_lalr = grammar.Grammar('S', ('a', 'b', 'c', 'd', 'e'))
+
+      self.not_lalr.add_rule('S', ['a', 'A', 'd'])
+      self.not_lalr.add_rule('S', ['b', 'B', 'd'])
+      self.not_lalr.add_rule('S', ['a', 'B', 'e'])
+      self.not_lalr.add_rule('S', ['b', 'A', 'e'])
+      self.not_lalr.add_rule('A', ['c'])
+      self.not_lalr.add_rule('B', ['c'])
+
+      self.nullable = grammar.Grammar('S', ('a', 'b', 's'))
+
+      self.nullable.add_rule('S', ('A', 'B', 's'))
+      self.nullable.add_rule('A', ('a', 'A', 'A'))
+      self.nullable.add_empty('A')
+      self.nullable.add_rule('B', ('b', 'B', 'B'))
+      self.nullable.add_empty('B')
+
+   def _canonical(self, tables):
+      '''Renames the states in the order of a breadth-first traversal from
+         the start state, so tables built by different backends can be 
+         compared.'''
+      action_table, goto_table, start_state = tables
+      order = {start_state: 0}
+      to_process = [start_state]
+      while to_process:
+         state = to_process.pop(0)
+         for symbol in sorted(goto_table.get(state, {})):
+            next_state = goto_table[state][symbol]
+            if next_state not in order:
+               order[next_state] = len(order)
+               to_process.append(next_state)
+
+      rows = []
+      for state in sorted(order, key=order.get):
+         actions = []
+         for terminal, action in sorted(action_table.get(state, {}).items()):
+            if hasattr(action, '_state_to_shift'):
+               actions.append((terminal, order[action._state_to_shift]))
+            else:
+               actions.append((terminal, str(action)))
+
+         gotos = [(symbol, order[next_state]) for symbol, next_state 
+                              in sorted(goto_table.get(state, {}).items())]
+         rows.append((actions, gotos))
+
+      return rows
+
+   def test_encoding(self):
+      encoding = Encoding(self.arith)
+      self.assertTrue(len(encoding.productions) == 7)
+      self.assertTrue(encoding.stride == 4)
+      self.assertTrue(self.arith.EOF in encoding.terminal_ids)
+
+      core = encoding.core(LR0('E', 0, 1))
+      self.assertTrue(encoding.next_symbol[core] == '+')
+      self.assertTrue(encoding.next_symbol[core + 2] is None)
+
+   def test_lr1_items_with_the_same_core_are_merged(self):
+      encoding = Encoding(self.lrvalue)
+      start_item = LR1(self.lrvalue.START, 0, 0, self.lrvalue.EOF)
+      kernel = ((encoding.core(start_item), 
+                 encoding.mask_of([self.lrvalue.EOF])), )
+
+      merged = encoding.lr1_closure(kernel)
+      expected = closure([start_item], self.lrvalue)
+      
+      self.assertTrue(len(merged) < len(expected))
+      self.assertTrue(sum(len(encoding.terminals_of(lookaheads)) 
+                           for lookaheads in merged.values()) == len(expected))
+      
+      for item in expected:
+         core = encoding.core(item)
+         self.assertTrue(item.lookahead in \
+               encoding.terminals_of(merged[core]))
+
+   def test_same_tables_lr0(self):
+      start_item = LR0(self.arith.START, 0, 0)
+      expected = build_parsing_table(self.arith, start_item)
+      found = build_parsing_table(self.arith, start_item, compact=True)
+
+      self.assertTrue(len(found[0]) == 12)
+      self.assertTrue(self._canonical(expected) == self._canonical(found))
+
+   def test_same_tables_slr(self):
+      start_item = LR0(self.arith.START, 0, 0)
+      expected = build_parsing_table(self.arith, start_item)
+      found = build_parsing_table_slr(self.arith, start_item)
+
+      self.assertTrue(self._canonical(expected) == self._canonical(found))
+      self.assertTrue(self._canonical(found) == self._canonical(
+            build_parsing_table_slr(self.arith, 
+                                    LALR(self.arith.START, 0, 0))))
+
+   def test_same_tables_lr1(self):
+      start_item = LR1(self.lrvalue.START, 0, 0, self.lrvalue.EOF)
+      expected = build_parsing_table(self.lrvalue, start_item, False)
+      found = build_parsing_table(self.lrvalue, start_item, False, 
+                                                            compact=True)
+
+      self.assertTrue(len(found[0]) == len(expected[0]))
+      self.assertTrue(self._canonical(expected) == self._canonical(found))
+
+   def test_parallel_expansion(self):
+      start_item = LR1(self.lrvalue.START, 0, 0, self.lrvalue.EOF)
+      expected = build_parsing_table(self.lrvalue, start_item, compact=True, 
+                                     disable_mapping=True)
+      found = build_parsing_table(self.lrvalue, start_item, compact=True, 
+                                  disable_mapping=True, processes=2)
+
+      self.assertTrue(expected == found)
+
+   def test_reduce_reduce_conflict(self):
+      self.assertRaisesRegexp(ReduceReduce, "during process '#' terminal", 
+            build_parsing_table, self.reduce_reduce, 
+            LR0(self.reduce_reduce.START, 0, 0), False, False, True)
+
+   def test_digraph(self):
+      # 0 -> 1 -> 2 -> 1 and 3 -> 0
+      found = digraph([[1], [2], [1], [0]], [1, 2, 4, 8])
+      self.assertTrue(found == [7, 6, 6, 15])
+
+   def test_same_tables_lalr(self):
+      expected = build_parsing_table_lalr(self.lrvalue, 
+                                          LR0(self.lrvalue.START, 0, 0))
+      found = build_parsing_table(self.lrvalue, 
+                                  LALR(self.lrvalue.START, 0, 0), 
+                                  compact=True)
+
+      self.assertTrue(len(found[0]) == 13)
+      self.assertTrue(self._canonical(expected) == self._canonical(found))
+
+   def test_lalr_with_empty_rules(self):
+      action_table, goto_table, start_state = build_parsing_table(
+            self.nullable, LALR(self.nullable.START, 0, 0), compact=True)
+
+      start_actions = action_table[start_state]
+      self.assertTrue(sorted(start_actions) == ['a', 'b', 's'])
+      self.assertTrue(isinstance(start_actions['a'], Driver.Shift))
+      self.assertTrue(isinstance(start_actions['b'], Driver.Reduce))
+      self.assertTrue(isinstance(start_actions['s'], Driver.Reduce))
+
+      after_a = goto_table[start_state]['A']
+      self.assertTrue(sorted(action_table[after_a]) == ['b', 's'])
+
+   def test_weakly_compatible(self):
+      self.assertTrue(weakly_compatible((1, 2), (1, 2)))
+      self.assertTrue(weakly_compatible((1, 2), (4, 8)))
+      self.assertFalse(weakly_compatible((1, 2), (2, 1)))
+      self.assertTrue(weakly_compatible((3, 2), (2, 1)))
+
+   def test_pager_merges_the_compatible_states(self):
+      start_item = LR1(self.lrvalue.START, 0, 0, self.lrvalue.EOF)
+      canonical = build_parsing_table(self.lrvalue, start_item, compact=True)
+      lalr = build_parsing_table(self.lrvalue, 
+                                 LALR(self.lrvalue.START, 0, 0), 
+                                 compact=True)
+      found = build_parsing_table_pager(self.lrvalue, start_item)
+
+      self.assertTrue(len(canonical[0]) == 38)
+      self.assertTrue(len(found[0]) == len(lalr[0]))
+      self.assertTrue(self._canonical(lalr) == self._canonical(found))
+
+   def test_pager_does_not_merge_the_incompatible_states(self):
+      self.assertRaises(ReduceReduce, build_parsing_table, self.not_lalr, 
+            LALR(self.not_lalr.START, 0, 0), compact=True)
+
+      start_item = LR1(self.not_lalr.START, 0, 0, self.not_lalr.EOF)
+      expected = build_parsing_table(self.not_lalr, start_item, False, 
+                                                            compact=True)
+      found = build_parsing_table_pager(self.not_lalr, start_item, False)
+
+      self.assertTrue(self._canonical(expected) == self._canonical(found))
+
+   def test_auto_selects_the_cheapest_class(self):
+      for a_grammar, expected in ((self.arith, 'slr'), 
+                                  (self.lrvalue, 'lalr'),
+                                  (self.not_lalr, 'lr1')):
+         start_item = LR0(a_grammar.START, 0, 0)
+         name, selected = select_algorithm(a_grammar, start_item, False)
+         self.assertTrue(name == expected)
+
+         tables = build_parsing_table(a_grammar, start_item, False, 
+               algorithm='auto')
+         self.assertTrue(len(tables) == 3)
+         expected_tables = build_parsing_table(a_grammar, start_item, False, 
+               algorithm=expected)
+         self.assertTrue(self._canonical(tables) == 
+                           self._canonical(expected_tables))
+         self.assertTrue(self._canonical(selected) == 
+                           self._canonical(expected_tables))
+
+   def test_auto_detects_the_conflicts_of_reductions_of_same_length(self):
+      same_length = grammar.Grammar('S', ('a', 'b'))
+
+      same_length.add_rule('S', ['b'])
+      same_length.add_empty('S')
+      same_length.add_rule('S', ['b', 'A', 'a'])
+      same_length.add_rule('A', ['S'])
+
+      start_item = LR0(same_length.START, 0, 0)
+      self.assertRaises(ReduceReduce, build_parsing_table, same_length, 
+            start_item, algorithm='slr')
+      self.assertRaises(ReduceReduce, select_algorithm, same_length, 
+            start_item)
+
+   def test_auto_accepts_the_solved_conflicts(self):
+      dangling_else = grammar.Grammar('S', ('if', 'then', 'else', 'x'))
+
+      dangling_else.add_rule('S', ['if', 'x', 'then', 'S'])
+      dangling_else.add_rule('S', ['if', 'x', 'then', 'S', 'else', 'S'])
+      dangling_else.add_rule('S', ['x'])
+
+      start_item = LR0(dangling_else.START, 0, 0)
+      self.assertTrue(select_algorithm(dangling_else, start_item)[0] == 'slr')
+      self.assertRaises(ShiftReduce, select_algorithm, dangling_else, 
+            start_item, False)
+
+   def test_processes_without_a_parallel_builder(self):
+      start_item = LR1(self.arith.START, 0, 0, self.arith.EOF)
+      for options in (dict(), dict(algorithm='lr1', compact=True)):
+         self.assertRaises(ValueError, build_parsing_table, self.arith, 
+               start_item, processes=2, **options)
+
+      self.assertRaises(ValueError, build_parsing_table, self.arith, 
+            LALR(self.arith.START, 0, 0), compact=True, processes=2)
+
+   def test_unknown_algorithm(self):
+      self.assertRaises(ValueError, build_parsing_table, self.arith, 
+            LR0(self.arith.START, 0, 0), algorithm='LALR')
+
+   def test_auto_raises_the_conflicts_of_the_last_class(self):
+      self.assertRaises(ReduceReduce, build_parsing_table, 
+            self.reduce_reduce, LR0(self.reduce_reduce.START, 0, 0), 
+            algorithm='auto')
+
+
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from dragon.driver import Driver as DriverInterface
+from dragon.lr.builder import build_parsing_table
+from dragon.lr.driver import Driver
+from arith_fixture import ArithTestCase, ListLexer
+
+class FunctionalTestDefaultReductions(ArithTestCase):
+
+   def setUp(self):
+      ArithTestCase.setUp(self)
+      self.tables = build_parsing_table(self.arith, self.start_item)
+      self.compressed = build_parsing_table(self.arith, self.start_item, 
+                                            default_reductions=True)
+
+   def test_the_reductions_are_replaced_by_a_default(self):
+      self.assertTrue(self.compressed[1:] == self.tables[1:])
+
+      entries = sum(len(row) for row in self.tables[0].values())
+      compressed_entries = sum(len(row) for row in self.compressed[0].values())
+      self.assertTrue(compressed_entries < entries)
+
+      for state, row in self.tables[0].items():
+         compressed_row = self.compressed[0][state]
+         has_reductions = any(isinstance(action, Driver.Reduce) 
+                                 for action in row.values())
+         self.assertTrue(has_reductions == (Driver.DEFAULT in compressed_row))
+         for terminal, action in compressed_row.items():
+            if terminal != Driver.DEFAULT:
+               self.assertTrue(row[terminal] == action)
+
+   def test_parse(self):
+      self.assertParsesTheSums(Driver(*self.compressed))
+
+   def test_the_default_only_states_do_not_look_up_the_token(self):
+      class DefaultOnlyRow(dict):
+         def __contains__(self, terminal):
+            raise AssertionError("Lookup of %s" % terminal)
+
+      action_table = dict((state, DefaultOnlyRow(row) 
+                                    if row.keys() == [Driver.DEFAULT] else row)
+                           for state, row in self.compressed[0].items())
+      self.assertTrue(any(isinstance(row, DefaultOnlyRow) 
+                              for row in action_table.values()))
+
+      driver = Driver(action_table, *self.compressed[1:])
+      tokens = [('id', 2), ('+', None), ('id', 3)]
+      driver.parse(ListLexer(tokens))
+      self.assertTrue(self.results == [5])
+
+   def test_the_error_is_detected_before_the_shift(self):
+      driver = Driver(*self.compressed)
+      tokens = [('id', 2), ('+', None), ('id', 3), (')', None), ('id', 4)]
+      shifted = []
+      try:
+         for token, action, _, _ in driver.parse_by_step(
+                                                   ListLexer(tokens)):
+            if isinstance(action, Driver.Shift):
+               shifted.append(token[0])
+
+         self.fail()
+      except DriverInterface.UnexpectedToken:
+         pass
+
+      self.assertTrue(shifted == ['id', '+', 'id'])
+
+
+if __name__ == '__main__':
+   unittest.main()
@@ -216,5 +216,65 @@ class FunctionalTestFirst(unittest.TestCase):
       self.assertTrue('*' in expected)
       self.assertTrue('id' in expected)
 
+   def test_analysis_is_cached_until_the_grammar_changes(self):
+      analysis = self.lrvalue.analysis()
+      self.assertTrue(analysis is self.lrvalue.analysis())
+      self.assertFalse(analysis.is_nullable('R'))
+
+      self.lrvalue.add_empty('R')
+      self.assertTrue(analysis is not self.lrvalue.analysis())
+      self.assertTrue(self.lrvalue.analysis().is_nullable('R'))
+
+      expected = first(self.lrvalue, ['R'])
+      self.assertTrue(len(expected) == 4)
+      self.assertTrue(self.lrvalue.EMPTY in expected)
+
+      analysis = self.lrvalue.analysis()
+      self.lrvalue.add_terminal('x')
+      self.assertTrue(analysis is not self.lrvalue.analysis())
+
+   def test_suffix_first(self):
+      analysis = self.more_complex.analysis()
+
+      # S -> A q
+      self.assertTrue(analysis.suffix_first('S', 0, 0) == \
+            (frozenset(['a', 'c', 'q']), False))
+      self.assertTrue(analysis.suffix_first('S', 0, 1) == \
+            (frozenset(['q']), False))
+      self.assertTrue(analysis.suffix_first('S', 0, 2) == (frozenset(), True))
+
+      # A -> C a
+      self.assertTrue(analysis.suffix_first('A', 0, 0) == \
+            (frozenset(['a', 'c']), False))
+
+      # A -> <<e>>
+      self.assertTrue(analysis.suffix_first('A', 1, 0) == (frozenset(), True))
+
+      analysis = self.simple.analysis()
+
+      # A -> a A A
+      self.assertTrue(analysis.suffix_first('A', 0, 1) == \
+            (frozenset(['a']), True))
+
+   def test_terminal_masks(self):
+      analysis = self.more_complex.analysis()
+      grammar = self.more_complex
+
+      self.assertTrue(grammar.EOF in analysis.terminals)
+      self.assertTrue(grammar.PROBE in analysis.terminals)
+      self.assertTrue(analysis.mask_of([]) == 0)
+      for terminal in analysis.terminals:
+         mask = analysis.mask_of([terminal])
+         self.assertTrue(mask == 1 << analysis.terminal_id(terminal))
+         self.assertTrue(analysis.terminals_of(mask) == frozenset([terminal]))
+
+      mask = analysis.mask_of(['a', 'c', 'q'])
+      self.assertTrue(analysis.terminals_of(mask) == \
+            frozenset(['a', 'c', 'q']))
+      self.assertTrue(analysis.first_mask(['A', 'q']) == (mask, False))
+      self.assertTrue(analysis.suffix_first_mask('S', 0, 0) == (mask, False))
+      self.assertTrue(analysis.first_of_symbol_mask('q') == \
+            analysis.mask_of(['q']))
+
 if __name__ == '__main__':
    unittest.main()
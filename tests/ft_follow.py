@@ -220,5 +220,20 @@ class FunctionalTestFollow(unittest.TestCase):
       self.assertTrue('=' in expected)
       self.assertTrue(self.lrvalue_with_actions.EOF in expected)
 
+   def test_mutually_recursive_follow(self):
+      cycle = Grammar('S', ('c', 'd'))
+
+      cycle.add_rule('S', ['A'])
+      cycle.add_rule('A', ['B', 'c'])
+      cycle.add_rule('A', ['d'])
+      cycle.add_rule('B', ['A'])
+
+      self.assertTrue(follow(cycle, 'A') == frozenset(['c', cycle.EOF]))
+      self.assertTrue(follow(cycle, 'B') == frozenset(['c']))
+      self.assertTrue(follow(cycle, 'S') == frozenset([cycle.EOF]))
+
+      cycle.add_rule('B', ['A', 'd'])
+      self.assertTrue(follow(cycle, 'A') == frozenset(['c', 'd', cycle.EOF]))
+
 if __name__ == '__main__':
    unittest.main()
@@ -0,0 +1,87 @@
+import imp
+import os
+import shutil
+import tempfile
+import unittest
+import dragon.grammar as grammar
+from dragon.lr.builder import build_parsing_table
+from dragon.driver import Lexer
+from dragon.lr.generator import write_module, semantic_keys, semantic_mapping
+from dragon.lr.item import LR1
+from dragon.lr.tables import ParsingTables, semantic_actions
+
+class FunctionalTestGenerator(unittest.TestCase):
+
+   def setUp(self):
+      self.directory = tempfile.mkdtemp()
+
+      self.lrvalue = grammar.Grammar('S', ('=', '*', '(', ')', 'id'))
+
+      def assign(l, r):
+         return ('=', l, r)
+
+      self.lrvalue.add_rule('S', ['L', '=', 'R', assign])
+      self.lrvalue.add_rule('S', ['R'])
+      self.lrvalue.add_rule('L', ['*', 'R'])
+      self.lrvalue.add_rule('L', ['id', lambda value: value.upper()])
+      self.lrvalue.add_rule('R', ['L'])
+      self.lrvalue.add_rule('R', ['(', 'S', ')'])
+      self.lrvalue.add_empty('R')
+
+   def tearDown(self):
+      shutil.rmtree(self.directory)
+
+   def test_the_module_has_the_tables(self):
+      tables = build_parsing_table(self.lrvalue, 
+            LR1(self.lrvalue.START, 0, 0, self.lrvalue.EOF))
+      parsing_tables = ParsingTables.from_tables(self.lrvalue, tables)
+
+      path = os.path.join(self.directory, 'lrvalue_tables.py')
+      write_module(parsing_tables, self.lrvalue, path)
+      module = imp.load_source('lrvalue_tables', path)
+
+      self.assertTrue(module.RULES == tuple(parsing_tables.rules))
+      self.assertTrue(module.ACTION_TABLE == parsing_tables.action_table)
+      self.assertTrue(module.GOTO_TABLE == parsing_tables.goto_table)
+      self.assertTrue(module.START_STATE == parsing_tables.start_state)
+      self.assertTrue(module.TABLES.bind(semantic_actions(self.lrvalue)) == \
+            tables)
+
+   def test_the_module_binds_the_semantic_actions_by_key(self):
+      keys = semantic_keys(self.lrvalue)
+      self.assertTrue(set(key[2] for key in keys if key is not None) == 
+                        set(['assign', 'L -> id']))
+
+      mapping = semantic_mapping(self.lrvalue)
+      self.assertTrue(sorted(mapping) == ['L -> id', 'assign'])
+
+      tables = build_parsing_table(self.lrvalue, 
+            LR1(self.lrvalue.START, 0, 0, self.lrvalue.EOF))
+      path = os.path.join(self.directory, 'lrvalue_tables.py')
+      write_module(ParsingTables.from_tables(self.lrvalue, tables), 
+                   self.lrvalue, path)
+      module = imp.load_source('lrvalue_tables', path)
+      self.assertTrue(module.SEMANTICS == tuple(keys))
+
+      results = []
+      class ListLexer(Lexer):
+         def tokenizer(self):
+            for token in [('id', 'x'), ('=', None), ('id', 'y')]:
+               yield token
+            yield (grammar.Grammar.EOF, None)
+
+      driver = module.driver({'L -> id': lambda value: value * 2, 
+                              'assign': lambda l, r: results.append((l, r))})
+      driver.parse(ListLexer())
+      self.assertTrue(results == [('xx', 'yy')])
+
+   def test_different_actions_with_the_same_key(self):
+      def assign(l, r):
+         return (l, r)
+
+      self.lrvalue.add_rule('S', ['R', '=', 'R', assign])
+      self.assertRaises(ValueError, semantic_keys, self.lrvalue)
+
+
+if __name__ == '__main__':
+   unittest.main()
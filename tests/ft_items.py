@@ -0,0 +1,101 @@
+import unittest
+import dragon.grammar as grammar
+from dragon.lr.util import closure
+from dragon.lr.item import LR0, LR1, LALR
+
+class FunctionalTestItems(unittest.TestCase):
+
+   def setUp(self):
+      self.some = grammar.Grammar('S', ('c', 'd'))
+      
+      self.some.add_rule('S', ['C', 'C'])
+      self.some.add_rule('C', ['c', 'C'])
+      self.some.add_rule('C', ['d'])
+
+   def test_equality_is_exact(self):
+      self.assertTrue(LR0('C', 0, 1) == LR0('C', 0, 1))
+      self.assertFalse(LR0('C', 0, 1) != LR0('C', 0, 1))
+      self.assertTrue(LR0('C', 0, 1) != LR0('C', 1, 0))
+      self.assertTrue(LR0('C', 0, 1) == LALR('C', 0, 1))
+      self.assertTrue(LR0('C', 0, 1) != LR1('C', 0, 1, 'c'))
+      self.assertTrue(LR1('C', 0, 1, 'c') != LR1('C', 0, 1, 'd'))
+
+   def test_equality_does_not_depend_on_hash_collisions(self):
+      item = LR0('C', 0, 1)
+      other = LR0('C', 1, 0)
+      other._hash = item._hash
+
+      self.assertTrue(item != other)
+      self.assertTrue(len(set([item, other])) == 2)
+
+   def test_items_have_not_a_dict(self):
+      for item in (LR0('C', 0, 1), LR1('C', 0, 1, 'c'), LALR('C', 0, 1)):
+         self.assertFalse(hasattr(item, '__dict__'))
+
+   def test_derived_items_are_interned(self):
+      start = LR1(self.some.START, 0, 0, self.some.EOF)
+      first = closure([start], self.some)
+      second = closure([start], self.some)
+
+      self.assertTrue(first == second)
+      for item in first:
+         if item is not start:
+            self.assertTrue(any(item is other for other in second))
+
+      shifted = LR0('C', 0, 0).item_shifted(self.some)
+      self.assertTrue(shifted is LR0('C', 0, 0).item_shifted(self.some))
+
+   def test_lalr_items_are_not_shared(self):
+      item = LALR('C', 0, 0)
+      self.assertTrue(item.item_shifted(self.some) is not \
+            item.item_shifted(self.some))
+
+      self.some.add_rule('C', ['c'])
+      shifted = LR0('C', 0, 0).item_shifted(self.some)
+      self.assertTrue(shifted == LR0('C', 0, 1))
+
+   def test_lalr_propagates_only_the_new_lookaheads(self):
+      analysis = self.some.analysis()
+      source = LALR('C', 0, 1, analysis)
+      learnt = LALR('C', 0, 2, analysis)
+      pending = LALR('C', 1, 1, analysis)
+      source.subscribe(learnt)
+      source.subscribe(pending)
+      pending.add_new('d')
+
+      source.add_news(['c', 'd'])
+      self.assertTrue(source.new_lookaheads == set(['c', 'd']))
+      self.assertTrue(source.propagate_news() == [learnt])
+      self.assertTrue(source.lookaheads == set(['c', 'd']))
+      self.assertTrue(learnt.new_lookaheads == set(['c', 'd']))
+      self.assertTrue(pending.new_lookaheads == set(['c', 'd']))
+
+      source.add_new('c')
+      self.assertFalse(source.propagate())
+      self.assertTrue(source.propagate_news() == [])
+
+   def test_lalr_without_analysis(self):
+      source = LALR('C', 0, 1)
+      learnt = source.item_shifted(self.some)
+      source.subscribe(learnt)
+
+      source.add_new('c')
+      source.add_news(['d', 'c'])
+      self.assertTrue(source.new_lookaheads == set(['c', 'd']))
+      self.assertTrue(source.propagate())
+      self.assertTrue(learnt.new_lookaheads == set(['c', 'd']))
+
+      other = LALR('C', 0, 1)
+      other.add_new('e')
+      self.assertTrue(other.new_lookaheads == set(['e']))
+      self.assertTrue(source.lookaheads == set(['c', 'd']))
+
+      subscribed = LALR('C', 1, 1)
+      source.subscribe(subscribed)
+      source.add_new('e')
+      source.propagate()
+      self.assertTrue(subscribed.new_lookaheads == set(['e']))
+
+
+if __name__ == '__main__':
+   unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 import dragon.grammar as grammar
-from dragon.lr.util import kernel_collection
+from dragon.lr.util import kernel_collection, automaton, closure, goto, gotos
 from dragon.lr.item import LR0
 
 class FunctionalTestKernelCollection(unittest.TestCase):
@@ -122,6 +122,36 @@ class FunctionalTestKernelCollection(unittest.TestCase):
 
       self.assertTrue(states == collection)
 
+   def test_automaton_records_closures_and_transitions(self):
+      start_item = LR0(self.StartExtendedSymbol, 0, 0)
+      states = automaton(self.lrvalue, start_item)
+
+      self.assertTrue(states[0].kernel == frozenset([start_item]))
+      self.assertTrue(frozenset([state.kernel for state in states]) == \
+            kernel_collection(self.lrvalue, start_item))
+
+      for state in states:
+         self.assertTrue(state.items == closure(state.kernel, self.lrvalue))
+         for symbol in self.lrvalue.iter_on_all_symbols():
+            next_state = goto(state.items, symbol, self.lrvalue)
+            if next_state:
+               self.assertTrue(state.transitions[symbol].items == next_state)
+            else:
+               self.assertTrue(symbol not in state.transitions)
+
+   def test_gotos_only_for_the_symbols_after_a_position(self):
+      items = closure([LR0(self.StartExtendedSymbol, 0, 0)], self.arith)
+      found = gotos(items, self.arith)
+
+      self.assertTrue(frozenset(found.keys()) == \
+            frozenset(['E', 'T', 'F', '(', 'id']))
+      for symbol in self.arith.iter_on_all_symbols():
+         if symbol in found:
+            self.assertTrue(found[symbol] == \
+                  goto(items, symbol, self.arith, only_kernel=True))
+         else:
+            self.assertFalse(goto(items, symbol, self.arith))
+
 
 if __name__ == '__main__':
    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from dragon.driver import Driver as DriverInterface
+from dragon.lr.builder import build_parsing_table
+from dragon.lr.driver import Driver
+from dragon.lr.compress import merge_states
+from arith_fixture import ArithTestCase, ListLexer
+
+class FunctionalTestMergeStates(ArithTestCase):
+
+   def test_merge_the_states_with_the_same_behavior(self):
+      tables = build_parsing_table(self.arith, self.start_item)
+      action_table, _, _, merged = merge_states(*tables)
+      self.assertTrue(len(action_table) == len(tables[0]) == 22)
+
+      # The LR(1) states which differ only by their lookaheads have the 
+      # same default reductions.
+      tables = build_parsing_table(self.arith, self.start_item, 
+                                   default_reductions=True)
+      action_table, goto_table, start_state, merged = merge_states(*tables)
+
+      self.assertTrue(len(action_table) == 12)
+      self.assertTrue(sorted(sum(merged.values(), [])) == sorted(tables[0]))
+      self.assertTrue(start_state == tables[2])
+      for state, group in merged.items():
+         self.assertTrue(state == min(group))
+         for original in group:
+            self.assertTrue(len(tables[0][original]) == 
+                              len(action_table[state]))
+
+      for row in action_table.values():
+         for action in row.values():
+            if isinstance(action, Driver.Shift):
+               self.assertTrue(action._state_to_shift in merged)
+
+      for row in goto_table.values():
+         self.assertTrue(all(state in merged for state in row.values()))
+
+   def test_parse(self):
+      tables = build_parsing_table(self.arith, self.start_item, 
+                                   default_reductions=True)
+      action_table, goto_table, start_state, _ = merge_states(*tables)
+
+      driver = Driver(action_table, goto_table, start_state)
+      self.assertParsesTheSums(driver)
+
+      tokens = [('id', 2), ('+', None), (')', None)]
+      self.assertRaises(DriverInterface.UnexpectedToken, 
+                        driver.parse, ListLexer(tokens))
+
+
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from dragon.driver import Driver as DriverInterface
+from dragon.lr.builder import build_parsing_table
+from dragon.lr.tables import ParsingTables, semantic_actions
+from dragon.lr.packed import PackedTables, displace
+from arith_fixture import ArithTestCase, ListLexer
+
+class FunctionalTestPackedTables(ArithTestCase):
+
+   def packed(self, **options):
+      tables = build_parsing_table(self.arith, self.start_item, **options)
+      parsing_tables = ParsingTables.from_tables(self.arith, tables)
+      return parsing_tables, PackedTables(parsing_tables)
+
+   def test_displace(self):
+      rows = [{0: 1, 2: 2}, {1: 3}, {}, {0: 4, 1: 5, 2: 6}]
+      base, check, values = displace(rows)
+
+      for row_id, row in enumerate(rows):
+         for column in range(3):
+            index = base[row_id] + column
+            found = 0 <= index < len(check) and check[index] == row_id
+            self.assertTrue(found == (column in row))
+            if found:
+               self.assertTrue(values[index] == row[column])
+
+      self.assertTrue(len(check) < 3 * len(rows))
+
+   def test_same_actions(self):
+      for options in (dict(), dict(default_reductions=True)):
+         parsing_tables, packed = self.packed(**options)
+         action_table, goto_table, start_state = \
+               parsing_tables.bind(semantic_actions(self.arith))
+         packed_action_table, packed_goto_table, packed_start_state = \
+               packed.bind(semantic_actions(self.arith))
+
+         self.assertTrue(packed.states[packed_start_state] == start_state)
+         for state_id, state in enumerate(packed.states):
+            row = action_table.get(state, {})
+            packed_row = packed_action_table[state_id]
+            self.assertTrue(sorted(packed_row.keys()) == sorted(row.keys()))
+            for terminal, action in row.items():
+               packed_action = packed_row[terminal]
+               self.assertTrue(packed_action == action or 
+                  packed.states[packed_action._state_to_shift] == 
+                                                   action._state_to_shift)
+
+            for symbol, next_state in goto_table.get(state, {}).items():
+               if symbol in packed.nonterminal_ids:
+                  self.assertTrue(packed.states[
+                        packed_goto_table[state_id][symbol]] == next_state)
+
+   def test_parse(self):
+      _, packed = self.packed(default_reductions=True)
+      self.assertParsesTheSums(packed.driver(semantic_actions(self.arith)))
+
+   def test_unexpected_token(self):
+      _, packed = self.packed()
+      driver = packed.driver(semantic_actions(self.arith))
+      tokens = [('id', 2), ('+', None), (')', None)]
+      self.assertRaises(DriverInterface.UnexpectedToken, 
+                        driver.parse, ListLexer(tokens))
+      
+      tokens = [('id', 2), ('-', None)]
+      self.assertRaises(DriverInterface.UnexpectedToken, 
+                        driver.parse, ListLexer(tokens))
+
+
+if __name__ == '__main__':
+   unittest.main()
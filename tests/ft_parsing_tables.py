@@ -0,0 +1,83 @@
+import pickle
+import unittest
+import dragon.grammar as grammar
+from dragon.driver import Lexer
+from dragon.lr.builder import build_parsing_table
+from dragon.lr.item import LR0
+from dragon.lr.tables import ParsingTables, semantic_actions, productions, \
+                             SHIFT, REDUCE, ACCEPT
+
+class FunctionalTestParsingTables(unittest.TestCase):
+   class ListLexer(Lexer):
+      def __init__(self, tokens):
+         self._tokens = tokens
+
+      def tokenizer(self):
+         for token in self._tokens:
+            yield token
+
+         yield (grammar.Grammar.EOF, None)
+
+   def setUp(self):
+      self.arith = grammar.Grammar('E', ('+', '*', '(', ')', 'id'))
+
+      self.results = []
+      def add(e, t):
+         self.results.append(e + t)
+         return e + t
+
+      self.arith.add_rule('E', ['E', '+', 'T', add])
+      self.arith.add_rule('E', ['T'])
+      self.arith.add_rule('T', ['T', '*', 'F', lambda t, f: t * f])
+      self.arith.add_rule('T', ['F'])
+      self.arith.add_rule('F', ['(', 'E', ')'])
+      self.arith.add_rule('F', ['id'])
+
+      self.tables = build_parsing_table(self.arith, 
+                                        LR0(self.arith.START, 0, 0))
+
+   def test_tables_are_pure_data(self):
+      parsing_tables = ParsingTables.from_tables(self.arith, self.tables)
+      parsing_tables = pickle.loads(pickle.dumps(parsing_tables, 2))
+
+      kinds = set()
+      for row in parsing_tables.action_table.values():
+         for action in row.values():
+            kinds.add(action[0])
+            self.assertTrue(all(isinstance(value, int) for value in action))
+      
+      self.assertTrue(kinds == set([SHIFT, REDUCE, ACCEPT]))
+      self.assertTrue(len(parsing_tables.rules) == \
+            len(productions(self.arith)))
+
+   def test_bind(self):
+      parsing_tables = ParsingTables.from_tables(self.arith, self.tables)
+      vector = semantic_actions(self.arith)
+
+      self.assertTrue(parsing_tables.bind(vector) == self.tables)
+
+      driver = parsing_tables.driver(vector)
+      tokens = [('id', 2), ('*', None), ('id', 3), ('+', None), ('id', 4)]
+      driver.parse(self.ListLexer(tokens))
+      self.assertTrue(self.results == [10])
+
+   def test_bind_other_semantic_actions(self):
+      parsing_tables = ParsingTables.from_tables(self.arith, self.tables)
+      results = []
+      def pair(x, y):
+         results.append((x, y))
+         return (x, y)
+
+      vector = [None if definition is None else 
+                     (definition[0], definition[1], pair) 
+                  for definition in semantic_actions(self.arith)]
+
+      driver = parsing_tables.driver(vector)
+      tokens = [('id', 2), ('*', None), ('id', 3), ('+', None), ('id', 4)]
+      driver.parse(self.ListLexer(tokens))
+      self.assertTrue(results == [(2, 3), ((2, 3), 4)])
+      self.assertTrue(self.results == [])
+
+
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import unittest
+import dragon.grammar as grammar
+from dragon.lr.builder import build_parsing_table
+from dragon.lr.cache import TableCache, build_parsing_table_cached, \
+                            fingerprint
+from dragon.lr.driver import Driver
+from dragon.lr.item import LR0, LR1
+
+class FunctionalTestTableCache(unittest.TestCase):
+
+   def setUp(self):
+      self.directory = tempfile.mkdtemp()
+
+      self.arith = grammar.Grammar('E', ('+', '*', '(', ')', 'id'))
+
+      self.arith.add_rule('E', ['E', '+', 'T', lambda e, t: e + t])
+      self.arith.add_rule('E', ['T'])
+      self.arith.add_rule('T', ['T', '*', 'F', lambda t, f: t * f])
+      self.arith.add_rule('T', ['F'])
+      self.arith.add_rule('F', ['(', 'E', ')'])
+      self.arith.add_rule('F', ['id'])
+
+   def tearDown(self):
+      shutil.rmtree(self.directory)
+
+   def test_fingerprint(self):
+      key = fingerprint(self.arith, 'lalr')
+      self.assertTrue(key == fingerprint(self.arith, 'lalr'))
+      self.assertTrue(key != fingerprint(self.arith, 'lr1'))
+
+      self.arith.add_rule('F', ['-', 'F'])
+      self.assertTrue(key != fingerprint(self.arith, 'lalr'))
+
+   def test_the_tables_are_loaded_from_the_cache(self):
+      cache = TableCache(self.directory)
+      start_item = LR1(self.arith.START, 0, 0, self.arith.EOF)
+      expected = build_parsing_table(self.arith, start_item)
+
+      built = build_parsing_table_cached(self.arith, start_item, cache)
+      self.assertTrue(built == expected)
+      self.assertTrue(len(os.listdir(self.directory)) == 1)
+
+      loaded = build_parsing_table_cached(self.arith, start_item, cache)
+      self.assertTrue(loaded == expected)
+
+      action_table, _, start_state = loaded
+      action = action_table[start_state]['id']
+      self.assertTrue(isinstance(action, Driver.Shift))
+      self.assertTrue(action.production_str() == "F -> id")
+
+      build_parsing_table_cached(self.arith, start_item, cache, 
+                                 compact=True)
+      self.assertTrue(len(os.listdir(self.directory)) == 2)
+
+      build_parsing_table_cached(self.arith, start_item, cache, 
+                                 compact=True, processes=2)
+      self.assertTrue(len(os.listdir(self.directory)) == 2)
+
+   def test_the_reductions_are_bound_to_the_semantic_actions(self):
+      cache = TableCache(self.directory)
+      start_item = LR0(self.arith.START, 0, 0)
+      build_parsing_table_cached(self.arith, start_item, cache)
+      action_table, goto_table, start_state = build_parsing_table_cached(
+            self.arith, start_item, cache)
+
+      after_t = goto_table[start_state]['T']
+      after_times = goto_table[goto_table[after_t]['*']]['F']
+      reduce_action = action_table[after_times]['+']
+
+      stack_of_states = [start_state, after_t, 0, after_times]
+      synthesized = [2, None, 3]
+      reduce_action.eval(stack_of_states, goto_table, synthesized)
+      self.assertTrue(synthesized == [6])
+
+   def test_least_recently_used_tables_are_evicted(self):
+      cache = TableCache(self.directory, max_size = 10)
+      cache.store('first', range(10))
+      self.assertTrue(os.listdir(self.directory) == [])
+
+      cache = TableCache(self.directory)
+      cache.store('first', range(10))
+      cache.store('second', range(10))
+      os.utime(os.path.join(self.directory, 'first.tables'), (0, 0))
+      self.assertTrue(cache.load('second') == range(10))
+
+      size = os.path.getsize(os.path.join(self.directory, 'second.tables'))
+      cache = TableCache(self.directory, max_size = 2 * size)
+      cache.store('third', range(10))
+      self.assertTrue(sorted(os.listdir(self.directory)) == \
+            ['second.tables', 'third.tables'])
+      self.assertTrue(cache.load('first') is None)
+
+   def test_a_file_that_cannot_be_loaded_is_a_miss(self):
+      cache = TableCache(self.directory)
+      for content in ('', 'garbage', 'cfoo\nbar\n.'):
+         with open(os.path.join(self.directory, 'key.tables'), 'wb') as f:
+            f.write(content)
+
+         self.assertTrue(cache.load('key') is None)
+
+   def test_a_failed_store_leaves_no_file(self):
+      cache = TableCache(self.directory)
+      self.assertRaises(Exception, cache.store, 'key', lambda: None)
+      self.assertTrue(os.listdir(self.directory) == [])
+
+
+if __name__ == '__main__':
+   unittest.main()
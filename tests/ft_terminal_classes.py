@@ -0,0 +1,46 @@
+import unittest
+from dragon.driver import Driver as DriverInterface
+from dragon.lr.builder import build_parsing_table
+from dragon.lr.driver import Driver
+from dragon.lr.compress import terminal_classes, use_terminal_classes
+from arith_fixture import ArithTestCase, ListLexer
+
+class FunctionalTestTerminalClasses(ArithTestCase):
+
+   def test_identical_columns(self):
+      reduce_a = Driver.Reduce('A', ['x'], None, False)
+      reduce_b = Driver.Reduce('B', ['x'], None, False)
+      action_table = {
+            0: {'x': Driver.Shift(1, 'A', ['x']), 'y': Driver.Shift(2, 'A', [])},
+            1: {'+': reduce_a, '-': reduce_a, ';': reduce_a},
+            2: {'+': reduce_b, '-': reduce_b, ';': reduce_a},
+            }
+
+      classes = terminal_classes(action_table)
+      self.assertTrue(classes['+'] == classes['-'])
+      self.assertTrue(len(set(classes.values())) == 4)
+
+      compressed_table, classes = use_terminal_classes(action_table)
+      self.assertTrue(len(compressed_table[1]) == 2)
+      for state, row in action_table.items():
+         for terminal, action in row.items():
+            self.assertTrue(compressed_table[state][classes[terminal]] == \
+                                                                     action)
+
+   def test_parse(self):
+      action_table, goto_table, start_state = build_parsing_table(self.arith, 
+                                                            self.start_item)
+      compressed_table, classes = use_terminal_classes(action_table)
+      driver = Driver(compressed_table, goto_table, start_state, classes)
+      self.assertParsesTheSums(driver)
+
+      tokens = [('id', 2), ('+', None), (')', None)]
+      try:
+         driver.parse(ListLexer(tokens))
+         self.fail()
+      except DriverInterface.UnexpectedToken, e:
+         self.assertTrue("'('" in str(e) and "'id'" in str(e))
+
+
+if __name__ == '__main__':
+   unittest.main()
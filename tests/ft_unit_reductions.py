@@ -0,0 +1,92 @@
+import unittest
+from dragon.driver import Driver as DriverInterface
+from dragon.lr.builder import build_parsing_table
+from dragon.lr.driver import Driver
+from dragon.lr.compress import bypass_unit_reductions, unit_reductions, \
+                               merge_states, terminal_classes
+from dragon.lr.tables import ParsingTables
+from arith_fixture import ArithTestCase, ListLexer, TOKENS, SUMS
+
+class FunctionalTestUnitReductions(ArithTestCase):
+
+   def steps(self, tables):
+      del self.results[:]
+      driver = Driver(*tables)
+      steps = [action for _, action, _, _ in 
+                  driver.parse_by_step(ListLexer(TOKENS))]
+      self.assertTrue(self.results == SUMS)
+      return steps
+
+   def test_unit_reductions(self):
+      self.assertTrue(unit_reductions(self.arith) == 
+                        {'E -> T': 'E', 'T -> F': 'T'})
+
+      self.arith.add_rule('E', ['F', lambda v: v])
+      self.arith.add_rule('T', ['E', lambda v: v * 2])
+      units = unit_reductions(self.arith)
+      self.assertTrue('E -> F' in units and 'T -> E' not in units)
+
+   def test_bypass(self):
+      for default_reductions in (False, True):
+         tables = build_parsing_table(self.arith, self.start_item, 
+                                    default_reductions = default_reductions)
+         steps = self.steps(tables)
+
+         action_table = bypass_unit_reductions(self.arith, *tables[:2])
+         bypassed_steps = self.steps((action_table, ) + tables[1:])
+
+         self.assertTrue(len(bypassed_steps) < len(steps))
+         self.assertTrue(any(isinstance(action, Driver.ChainReduce) 
+                                 for action in bypassed_steps))
+         self.assertTrue(sum(1 for action in steps 
+                              if isinstance(action, Driver.Shift)) == 
+                         sum(1 for action in bypassed_steps 
+                              if isinstance(action, Driver.Shift)))
+
+   def test_bypass_and_merge_states(self):
+      tables = build_parsing_table(self.arith, self.start_item, 
+                                   default_reductions = True)
+      steps = self.steps(tables)
+
+      bypassed = (bypass_unit_reductions(self.arith, *tables[:2]), ) + \
+                                                                  tables[1:]
+      merged = merge_states(*bypassed)
+      self.assertTrue(len(merged[0]) < len(bypassed[0]))
+      self.assertTrue(len(self.steps(merged[:3])) < len(steps))
+
+      merged = merge_states(*tables)
+      bypassed = (bypass_unit_reductions(self.arith, *merged[:2]), ) + \
+                                                                  merged[1:3]
+      self.assertTrue(len(self.steps(bypassed)) < len(steps))
+
+   def test_the_chains_are_part_of_the_actions(self):
+      tables = build_parsing_table(self.arith, self.start_item)
+      action_table = bypass_unit_reductions(self.arith, *tables[:2])
+
+      chains = set()
+      for row in action_table.values():
+         for action in row.values():
+            if isinstance(action, Driver.ChainReduce):
+               chains.add((action.production_str(), 
+                           tuple(sorted(action.targets().items()))))
+
+      productions = [production for production, _ in chains]
+      self.assertTrue(len(set(productions)) < len(productions))
+      self.assertTrue(len(set(terminal_classes(action_table).values())) == 
+                      len(set(terminal_classes(tables[0]).values())))
+
+      self.assertRaises(ValueError, ParsingTables.from_tables, self.arith, 
+                        (action_table, ) + tables[1:])
+
+   def test_unexpected_token(self):
+      tables = build_parsing_table(self.arith, self.start_item)
+      action_table = bypass_unit_reductions(self.arith, *tables[:2])
+      driver = Driver(action_table, *tables[1:])
+
+      tokens = [('id', 3), ('+', None), ('id', 2), ('id', 1)]
+      self.assertRaises(DriverInterface.UnexpectedToken, 
+                        driver.parse, ListLexer(tokens))
+
+
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+import dragon.grammar as grammar
+from dragon.lr.builder import build_parsing_table
+from dragon.lr.conflict import ShiftReduce
+from dragon.lr.driver import Driver
+from dragon.lr.item import LR0, LR1
+
+class RegressionTestAcceptConflict(unittest.TestCase):
+
+   def setUp(self):
+      self.cyclic = grammar.Grammar('S', ('a', ))
+
+      self.cyclic.add_rule('S', ['a'])
+      self.cyclic.add_rule('S', ['T'])
+      self.cyclic.add_rule('T', ['S'])
+
+   def test_accept_reduce_conflict(self):
+      for start_item in (LR0(self.cyclic.START, 0, 0), 
+                         LR1(self.cyclic.START, 0, 0, self.cyclic.EOF)):
+         self.assertRaises(ShiftReduce, build_parsing_table, self.cyclic, 
+               start_item, False)
+
+         action_table, goto_table, start_state = build_parsing_table(
+               self.cyclic, start_item)
+         accept_state = goto_table[start_state]['S']
+         self.assertTrue(isinstance(
+               action_table[accept_state][self.cyclic.EOF], Driver.Accept))
+
+
+if __name__ == '__main__':
+   unittest.main()